@@ -0,0 +1,109 @@
+"""Compare invoking the server for every order against the response cache.
+
+Starts the server app under uvicorn behind a local sidecar stand-in and sends
+orders through the client app's own invoke_order() from a number of
+concurrent tasks. Order IDs are drawn at random from --distinct IDs, so the
+same order is sent again and again, as when callers retry or poll. Runs once
+with the cache off and once with --cache-size entries, and prints req/s,
+p50/p99 latency, the calls that reached the sidecar and the cache's hit rate
+for each. No Catalyst project is needed.
+
+    uv run python benchmarks/bench_cache.py --requests 5000 --distinct 500 --cache-size 1000
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+# The benchmark imports the client app's own modules.
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR / 'client'))
+
+import main as client_app
+from cache import ResponseCache
+from sidecar import LocalSidecar
+
+SERVER_PORT = 5022
+
+
+def launch_server(max_age):
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(SERVER_PORT), '--log-level', 'warning'],
+        cwd=APP_DIR / 'server', env={**os.environ, 'ORDER_CACHE_MAX_AGE': str(max_age)},
+        stderr=subprocess.DEVNULL)
+
+
+def wait_until_healthy(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f'{url} did not become healthy')
+
+
+async def run(name, cache_size, sidecar, args):
+    client_app.response_cache = ResponseCache(size=cache_size, ttl=args.ttl)
+    client_app.http_client = client_app.new_http_client()
+    order_ids = random.Random(1).choices(range(args.distinct), k=args.requests)
+    pending = iter(order_ids)
+    latencies = []
+    calls = sidecar.calls
+
+    async def worker():
+        for order_id in pending:
+            start = time.perf_counter()
+            await client_app.invoke_order(client_app.Order(orderId=order_id))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await client_app.http_client.aclose()
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'{name:<10} {args.requests / elapsed:>8.0f} req/s   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms   '
+          f'sidecar calls {sidecar.calls - calls:>6}   hit rate {client_app.response_cache.stats()["hitRate"]:.1%}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--distinct', type=int, default=500, help='distinct order IDs the requests are drawn from')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--cache-size', type=int, default=1000, help='INVOKE_CACHE_SIZE for the cached run')
+    parser.add_argument('--ttl', type=float, default=5, help='INVOKE_CACHE_TTL for the cached run')
+    parser.add_argument('--max-age', type=int, default=60, help='ORDER_CACHE_MAX_AGE for the server')
+    parser.add_argument('--latency-ms', type=float, default=5,
+                        help='simulated sidecar-to-sidecar latency per invocation')
+    args = parser.parse_args()
+
+    sidecar = LocalSidecar(apps={'server': SERVER_PORT}, latency_ms=args.latency_ms)
+    sidecar.start()
+    client_app.base_url = sidecar.environ()['DAPR_HTTP_ENDPOINT']
+    server = launch_server(args.max_age)
+    try:
+        wait_until_healthy(f'http://127.0.0.1:{SERVER_PORT}/')
+        asyncio.run(run('no cache', 0, sidecar, args))
+        asyncio.run(run('cache', args.cache_size, sidecar, args))
+    finally:
+        server.terminate()
+        server.wait()
+        sidecar.stop()
+
+
+if __name__ == '__main__':
+    main()
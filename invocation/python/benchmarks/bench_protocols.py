@@ -0,0 +1,127 @@
+"""Compare HTTP/JSON and gRPC/protobuf invocation side by side.
+
+For each protocol, starts the server app the way that protocol needs it
+(main:app under uvicorn for HTTP, grpc_server.py for gRPC) behind a local
+sidecar stand-in, starts the client app with INVOKE_PROTOCOL set to match, and
+sends orders to the client's POST /order from a number of concurrent tasks.
+Prints req/s and p50/p99 latency, and the CPU time each app spent per
+request, read from /proc, so it runs on Linux only. No Catalyst project is
+needed.
+
+    uv run python benchmarks/bench_protocols.py --requests 2000 --concurrency 8
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+from sidecar import LocalSidecar
+
+APP_DIR = Path(__file__).resolve().parent.parent
+CLIENT_PORT = 5021
+SERVER_PORT = 5022
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+SERVERS = {
+    'http': [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(SERVER_PORT), '--log-level', 'warning'],
+    'grpc': [sys.executable, 'grpc_server.py'],
+}
+
+
+def launch(directory, command, env):
+    return subprocess.Popen(command, cwd=APP_DIR / directory, env=env, stderr=subprocess.DEVNULL)
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time the process has used so far."""
+    with open(f'/proc/{pid}/stat') as stat:
+        fields = stat.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+async def wait_until_ready(session, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.post(url, json={'orderId': 0}) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f'{url} did not become ready')
+
+
+async def wait_ready(url):
+    # Ready once an order goes all the way through to the server.
+    async with aiohttp.ClientSession() as session:
+        await wait_until_ready(session, url)
+
+
+async def load(url, args):
+    order_ids = iter(range(args.requests))
+    latencies = []
+
+    async with aiohttp.ClientSession() as session:
+        async def worker():
+            for order_id in order_ids:
+                start = time.perf_counter()
+                async with session.post(url, json={'orderId': order_id}) as response:
+                    await response.read()
+                    response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        return time.perf_counter() - start, sorted(latencies)
+
+
+def run(protocol, args):
+    sidecar = LocalSidecar(apps={'server': SERVER_PORT}, latency_ms=args.latency_ms)
+    sidecar.start()
+    env = {**os.environ, **sidecar.environ(), 'APP_PORT': str(SERVER_PORT), 'INVOKE_PROTOCOL': protocol}
+    server = launch('server', SERVERS[protocol], env)
+    client = launch('client', [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(CLIENT_PORT),
+                               '--log-level', 'warning'], env)
+    try:
+        url = f'http://127.0.0.1:{CLIENT_PORT}/order'
+        asyncio.run(wait_ready(url))
+        client_cpu, server_cpu = cpu_seconds(client.pid), cpu_seconds(server.pid)
+        elapsed, latencies = asyncio.run(load(url, args))
+        client_cpu = cpu_seconds(client.pid) - client_cpu
+        server_cpu = cpu_seconds(server.pid) - server_cpu
+    finally:
+        client.terminate()
+        server.terminate()
+        client.wait()
+        server.wait()
+        sidecar.stop()
+
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'{protocol:<5} {args.requests / elapsed:>8.0f} req/s   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms   '
+          f'CPU per request: client {client_cpu / args.requests * 1000:.3f} ms   '
+          f'server {server_cpu / args.requests * 1000:.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=1,
+                        help='simulated sidecar-to-sidecar latency per invocation')
+    parser.add_argument('--protocols', nargs='+', choices=sorted(SERVERS), default=['http', 'grpc'])
+    args = parser.parse_args()
+
+    for protocol in args.protocols:
+        run(protocol, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Compare invocation policies against a stub server that is slow and fails.
+
+Sends orders at a steady --rate through the client app's own invoke_order(),
+from a number of concurrent tasks, to a local stub that stands in for the server and its
+sidecar. The stub adds a base latency, makes a share of requests slow and
+fails another share, and with --outage-s goes down entirely for a while a
+quarter of the way through each run. Each policy runs in turn: no retries,
+jittered retries, and retries with hedging. For each it prints the share of
+orders that succeeded, p50/p99/p99.9 latency and what the policy did. No
+Catalyst project is needed.
+
+    uv run python benchmarks/bench_resilience.py --requests 3000 --error-rate 0.05 --slow-rate 0.02 --outage-s 2
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import sys
+import time
+
+# The benchmark imports the client app's own modules.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'client'))
+
+import main as client_app
+from resilience import InvocationError, Resilience
+from stub_server import StubServer
+
+
+def policies(args):
+    common = dict(timeout=args.timeout_ms / 1000, breaker_failures=args.breaker_failures,
+                  breaker_reset=args.breaker_reset)
+    return {
+        'no retries': Resilience(attempts=1, **common),
+        'retries': Resilience(attempts=3, **common),
+        'retries+hedging': Resilience(attempts=3, hedge_after=args.hedge_after_ms / 1000, **common),
+    }
+
+
+def percentile(ordered, percentile):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))] * 1000
+
+
+async def run(name, resilience, stub, args):
+    client_app.resilience = resilience
+    client_app.http_client = client_app.new_http_client()
+    stub.outage(0)
+    order_ids = iter(range(args.requests))
+    latencies, failed = [], 0
+    started = time.perf_counter()
+
+    async def worker():
+        nonlocal failed
+        for order_id in order_ids:
+            # Orders go out on schedule, so a failing-fast open circuit does
+            # not race through the rest of the run.
+            delay = started + order_id / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if order_id == args.requests // 4 and args.outage_s:
+                stub.outage(args.outage_s)
+            start = time.perf_counter()
+            try:
+                await client_app.invoke_order(client_app.Order(orderId=order_id))
+            except InvocationError:
+                failed += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    await client_app.http_client.aclose()
+
+    latencies.sort()
+    counters = resilience.stats()["apps"][client_app.invoke_appid]
+    print(f'{name:<16} ok {100 * (1 - failed / args.requests):>6.2f}%   p50 {percentile(latencies, 50):>7.2f} ms   '
+          f'p99 {percentile(latencies, 99):>7.2f} ms   p99.9 {percentile(latencies, 99.9):>7.2f} ms   '
+          f'retries {counters["retries"]:>4}   timeouts {counters["timeouts"]:>4}   '
+          f'hedges {counters["hedges"]:>4} (won {counters["hedgeWins"]})   '
+          f'circuit opened {counters["circuitOpened"]} / short-circuited {counters["shortCircuited"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--rate', type=float, default=200, help='orders sent per second')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=2, help='base latency of the stub')
+    parser.add_argument('--slow-rate', type=float, default=0.02, help='share of requests made slow')
+    parser.add_argument('--slow-ms', type=float, default=200, help='latency of a slow request')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='share of requests that fail with 503')
+    parser.add_argument('--outage-s', type=float, default=0, help='seconds the stub is down in each run')
+    parser.add_argument('--timeout-ms', type=float, default=1000, help='per-attempt timeout')
+    parser.add_argument('--hedge-after-ms', type=float, default=50, help='hedge an attempt slower than this')
+    parser.add_argument('--breaker-failures', type=int, default=5)
+    parser.add_argument('--breaker-reset', type=float, default=1, help='seconds the circuit stays open')
+    args = parser.parse_args()
+
+    stub = StubServer(latency_ms=args.latency_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+                      error_rate=args.error_rate)
+    stub.start()
+    client_app.base_url = stub.url
+    try:
+        for name, resilience in policies(args).items():
+            asyncio.run(run(name, resilience, stub, args))
+    finally:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
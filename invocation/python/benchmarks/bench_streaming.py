@@ -0,0 +1,113 @@
+"""Stream orders through POST /orders/stream and watch memory stay flat.
+
+Starts the client and the server under uvicorn behind a local sidecar
+stand-in, then streams growing numbers of orders as NDJSON through the client
+to the server's /neworder/stream. Each order is padded to --order-bytes. After
+each stream it prints the throughput and the peak resident memory of both
+apps so far: if the stream were buffered anywhere, the peak would grow with
+it. Reads peak memory from /proc, so it runs on Linux only. No Catalyst
+project is needed.
+
+    uv run python benchmarks/bench_streaming.py --orders 10000 100000 --order-bytes 1000
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from sidecar import LocalSidecar
+
+APP_DIR = Path(__file__).resolve().parent.parent
+CLIENT_PORT = 5021
+SERVER_PORT = 5022
+CHUNK_BYTES = 64 * 1024
+
+
+def launch(directory, port, env):
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR / directory, env=env, stderr=subprocess.DEVNULL)
+
+
+async def wait_until_healthy(http, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await http.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f'{url} did not become healthy')
+
+
+def peak_rss_mb(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def order_stream(orders, order_bytes):
+    """Yield NDJSON orders in chunks of about CHUNK_BYTES, generated as sent."""
+    chunk = bytearray()
+    for order_id in range(orders):
+        line = b'{"orderId":%d,"notes":"' % order_id
+        chunk += line + b'x' * max(0, order_bytes - len(line) - 3) + b'"}\n'
+        if len(chunk) >= CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+async def bench(sidecar, args):
+    env = {**os.environ, **sidecar.environ()}
+    server = launch('server', SERVER_PORT, env)
+    client = launch('client', CLIENT_PORT, env)
+    try:
+        async with httpx.AsyncClient(timeout=None) as http:
+            await wait_until_healthy(http, f'http://127.0.0.1:{SERVER_PORT}/')
+            await wait_until_healthy(http, f'http://127.0.0.1:{CLIENT_PORT}/')
+            print(f'{"at start":>14}   client peak {peak_rss_mb(client.pid):>6.1f} MB   '
+                  f'server peak {peak_rss_mb(server.pid):>6.1f} MB')
+            for orders in args.orders:
+                start = time.perf_counter()
+                response = await http.post(f'http://127.0.0.1:{CLIENT_PORT}/orders/stream',
+                                           content=order_stream(orders, args.order_bytes),
+                                           headers={'content-type': 'application/x-ndjson'})
+                elapsed = time.perf_counter() - start
+                response.raise_for_status()
+                streamed_mb = orders * args.order_bytes / 1024 / 1024
+                print(f'{orders:>8} orders   {streamed_mb:>7.1f} MB   {orders / elapsed:>7.0f} orders/s   '
+                      f'client peak {peak_rss_mb(client.pid):>6.1f} MB   server peak {peak_rss_mb(server.pid):>6.1f} MB')
+    finally:
+        client.terminate()
+        server.terminate()
+        client.wait()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, nargs='+', default=[10000, 100000],
+                        help='orders per stream, one stream for each')
+    parser.add_argument('--order-bytes', type=int, default=1000, help='size of each order line')
+    args = parser.parse_args()
+
+    sidecar = LocalSidecar(apps={'server': SERVER_PORT})
+    sidecar.start()
+    try:
+        asyncio.run(bench(sidecar, args))
+    finally:
+        sidecar.stop()
+
+
+if __name__ == '__main__':
+    main()
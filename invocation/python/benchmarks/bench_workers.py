@@ -0,0 +1,95 @@
+"""Measure how the server's throughput scales with its number of workers.
+
+For each worker count, starts the server with serve.py and SERVER_WORKERS set
+to it, and posts orders straight to its /neworder from a number of
+concurrent connections for a fixed time. Prints req/s and p50/p99 latency for
+each count. More workers only help while there are idle CPU cores for them,
+so the cores available are printed too. No Catalyst project is needed.
+
+    uv run python benchmarks/bench_workers.py --workers 1 2 4 --duration 10
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+APP_DIR = Path(__file__).resolve().parent.parent
+SERVER_PORT = 5022
+
+
+async def wait_until_healthy(session, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f'{url} did not become healthy')
+
+
+async def load(args):
+    url = f'http://127.0.0.1:{SERVER_PORT}'
+    latencies = []
+    # A connection per task: SO_REUSEPORT spreads connections, not requests,
+    # across the workers.
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_until_healthy(session, f'{url}/')
+        deadline = time.monotonic() + args.duration
+
+        async def worker(n):
+            order_id = n
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                async with session.post(f'{url}/neworder', json={'orderId': order_id}) as response:
+                    await response.read()
+                    response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                order_id += args.concurrency
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+        return time.perf_counter() - start, sorted(latencies)
+
+
+def run(workers, args):
+    env = {**os.environ, 'SERVER_WORKERS': str(workers), 'APP_PORT': str(SERVER_PORT),
+           'SERVER_LOG_LEVEL': 'warning'}
+    server = subprocess.Popen([sys.executable, 'serve.py'], cwd=APP_DIR / 'server', env=env,
+                              stderr=subprocess.DEVNULL)
+    try:
+        elapsed, latencies = asyncio.run(load(args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'workers {workers:>2} {len(latencies) / elapsed:>9.0f} req/s   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=64, help='concurrent connections')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to load each worker count for')
+    args = parser.parse_args()
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    print(f'{cores} CPU core(s) available')
+    for workers in args.workers:
+        run(workers, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""The client app's POST /order as it was before the pooled HTTP client, for
+benchmarks only.
+
+Each invocation makes a blocking request on a new connection from inside the
+async handler, so the event loop, and every other request to the app, waits
+for the whole round-trip. Served under uvicorn by bench_http_client.py.
+"""
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+import os
+import urllib.error
+import urllib.request
+
+app = FastAPI()
+
+base_url = os.getenv('DAPR_HTTP_ENDPOINT', 'http://localhost')
+invoke_appid = os.getenv('INVOKE_APPID', 'server')
+
+
+class Order(BaseModel):
+    orderId: int
+
+
+@app.post('/order')
+async def send_order(order: Order):
+    request = urllib.request.Request(
+        f'{base_url}/neworder', data=order.model_dump_json().encode(),
+        headers={'dapr-app-id': invoke_appid, 'content-type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+    except (urllib.error.URLError, OSError):
+        raise HTTPException(status_code=500, detail={"error": {"code": "INVOCATION_ERROR", "message": "Failed to invoke service"}})
+    return {"message": "Invocation successful", "orderId": order.orderId, "targetApp": invoke_appid}
+
+
+@app.get('/')
+async def read_root():
+    return {"status": "healthy"}
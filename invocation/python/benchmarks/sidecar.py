@@ -0,0 +1,197 @@
+"""A local stand-in for the Dapr sidecar, for benchmarks only.
+
+Serves HTTP service invocation the way the client app uses it: a request whose
+dapr-app-id header names an app, or whose path is /v1.0/invoke/<app>/method/...,
+is forwarded to that app's local port and the app's response is returned.
+Chunked request bodies are streamed through to the app as they arrive.
+
+Serves gRPC proxying too: any gRPC call carrying dapr-app-id metadata is
+forwarded, undecoded, to the same method on that app's port, which must then
+be a gRPC app. An optional per-call latency approximates the hop between two
+sidecars, for either protocol.
+
+    sidecar = LocalSidecar(apps={'server': 5022}, latency_ms=1)
+    sidecar.start()
+    ...   # point DAPR_HTTP_ENDPOINT and DAPR_GRPC_ENDPOINT at sidecar.environ()
+    sidecar.stop()
+"""
+
+from concurrent import futures
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import re
+import threading
+import time
+
+import grpc
+
+INVOKE_PATH = re.compile(r'^/v1\.0/invoke/([^/]+)/method(/.*)$')
+# Response headers passed back from the app to the caller.
+FORWARDED_HEADERS = ('Content-Type', 'Cache-Control')
+INVOKE_ERROR = 500, b'{"errorCode":"ERR_DIRECT_INVOKE"}', {'Content-Type': 'application/json'}
+
+
+def _forwarded(response):
+    return {name: value for name in FORWARDED_HEADERS if (value := response.getheader(name))}
+
+
+def _read_chunked(rfile):
+    while size := int(rfile.readline().split(b';')[0], 16):
+        yield rfile.read(size)
+        rfile.readline()
+    rfile.readline()
+
+
+class _Invoke(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; on a kept-alive connection
+    # Nagle's algorithm would hold the body back for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith('/v1.0/healthz'):
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._forward()
+
+    def do_POST(self):
+        self._forward()
+
+    def _forward(self):
+        sidecar = self.server.sidecar
+        app_id, path = self.headers.get('dapr-app-id'), self.path
+        if match := INVOKE_PATH.match(self.path):
+            app_id, path = match.groups()
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = _read_chunked(self.rfile)
+            # The app may answer before reading the whole stream, leaving the
+            # rest unread on this connection.
+            self.close_connection = True
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if app_id not in sidecar.apps:
+            self._reply(*INVOKE_ERROR)
+            return
+        if sidecar.latency_s:
+            time.sleep(sidecar.latency_s)
+        status, payload, headers = sidecar.call(app_id, self.command, path, body,
+                                                self.headers.get('Content-Type'))
+        with sidecar.lock:
+            sidecar.calls += 1
+        self._reply(status, payload, headers)
+
+    def _reply(self, status, payload, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Proxy(grpc.GenericRpcHandler):
+    def __init__(self, sidecar):
+        self.sidecar = sidecar
+
+    def service(self, handler_call_details):
+        app_id = dict(handler_call_details.invocation_metadata).get('dapr-app-id')
+        method = handler_call_details.method
+        sidecar = self.sidecar
+
+        def forward(request, context):
+            if app_id not in sidecar.apps:
+                context.abort(grpc.StatusCode.UNAVAILABLE, f'app {app_id!r} not found')
+            if sidecar.latency_s:
+                time.sleep(sidecar.latency_s)
+            # No serializers: the request and response pass through as bytes.
+            call = sidecar.channel(app_id).unary_unary(method)
+            try:
+                response, app_call = call.with_call(request, timeout=context.time_remaining())
+            except grpc.RpcError as err:
+                context.abort(err.code(), err.details())
+            context.send_initial_metadata(app_call.initial_metadata())
+            with sidecar.lock:
+                sidecar.calls += 1
+            return response
+
+        return grpc.unary_unary_rpc_method_handler(forward)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for every connection a pooled client opens at once.
+    request_queue_size = 256
+
+
+class LocalSidecar:
+    def __init__(self, apps, latency_ms=0.0, workers=32):
+        self.apps = apps  # app ID -> local port
+        self.latency_s = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.calls = 0
+        self._connections = threading.local()
+        self._channels = {}
+        self._http = _Server(('127.0.0.1', 0), _Invoke)
+        self._http.sidecar = self
+        self.http_port = self._http.server_address[1]
+        self._grpc = grpc.server(futures.ThreadPoolExecutor(max_workers=workers), handlers=[_Proxy(self)])
+        self.grpc_port = self._grpc.add_insecure_port('127.0.0.1:0')
+
+    def channel(self, app_id):
+        """One gRPC channel per app, shared by every forwarded call."""
+        with self.lock:
+            if app_id not in self._channels:
+                self._channels[app_id] = grpc.insecure_channel(f'127.0.0.1:{self.apps[app_id]}')
+            return self._channels[app_id]
+
+    def call(self, app_id, method, path, body, content_type):
+        """Forward one request to an app over a kept-alive connection per thread,
+        retrying once on a fresh connection if the kept-alive one was closed.
+        A streamed body cannot be sent twice, so it gets a connection of its own."""
+        headers = {'Content-Type': content_type} if content_type else {}
+        if not isinstance(body, bytes):
+            connection = HTTPConnection('127.0.0.1', self.apps[app_id])
+            try:
+                connection.request(method, path, body=body, headers=headers, encode_chunked=True)
+                response = connection.getresponse()
+                return response.status, response.read(), _forwarded(response)
+            except OSError:
+                return INVOKE_ERROR
+            finally:
+                connection.close()
+        connections = self._connections.__dict__
+        for _ in range(2):
+            connection = connections.get(app_id)
+            if connection is None:
+                connection = connections[app_id] = HTTPConnection('127.0.0.1', self.apps[app_id])
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read(), _forwarded(response)
+            except OSError:
+                connection.close()
+                del connections[app_id]
+        return INVOKE_ERROR
+
+    def start(self):
+        self._grpc.start()
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def environ(self):
+        """Environment variables that point a separately started app at this sidecar."""
+        return {
+            'DAPR_GRPC_ENDPOINT': f'127.0.0.1:{self.grpc_port}',
+            'DAPR_HTTP_ENDPOINT': f'http://127.0.0.1:{self.http_port}',
+        }
+
+    def stop(self):
+        self._http.shutdown()
+        self._http.server_close()
+        self._grpc.stop(grace=None)
+        for channel in self._channels.values():
+            channel.close()
@@ -0,0 +1,90 @@
+"""A stub for the server app and its sidecar, for benchmarks only.
+
+Answers every POST the way the server does, after a base latency. A share of
+requests is made slow, and a share fails with an error status, at random, so
+the client's timeouts, retries, hedging and circuit breaking have something
+to work against. outage() fails every request for a while, as a server that
+has gone down would.
+
+    stub = StubServer(latency_ms=1, slow_rate=0.02, slow_ms=200, error_rate=0.05)
+    stub.start()
+    ...   # point DAPR_HTTP_ENDPOINT at stub.url
+    stub.stop()
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        delay, status = stub.decide()
+        time.sleep(delay)
+        if status == 200:
+            payload = json.dumps({"message": "Order received successfully", "orderId": body.get('orderId')})
+        else:
+            payload = json.dumps({"errorCode": "ERR_DIRECT_INVOKE"})
+        payload = payload.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # A client that cancels a hedged or timed-out call hangs up mid-reply.
+        pass
+
+
+class StubServer:
+    def __init__(self, latency_ms=1.0, slow_rate=0.0, slow_ms=200.0, error_rate=0.0, error_status=503):
+        self.latency_s = latency_ms / 1000
+        self.slow_rate = slow_rate
+        self.slow_s = slow_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "slow": 0, "errors": 0}
+        self._down_until = 0.0
+        self._http = _Server(('127.0.0.1', 0), _Stub)
+        self._http.stub = self
+        self.url = f'http://127.0.0.1:{self._http.server_address[1]}'
+
+    def decide(self):
+        """The delay and status for the next request."""
+        delay, status = self.latency_s, 200
+        with self.lock:
+            self.counters["requests"] += 1
+            if time.monotonic() < self._down_until or random.random() < self.error_rate:
+                self.counters["errors"] += 1
+                return delay, self.error_status
+            if random.random() < self.slow_rate:
+                self.counters["slow"] += 1
+                delay = self.slow_s
+        return delay, status
+
+    def outage(self, seconds):
+        self._down_until = time.monotonic() + seconds
+
+    def start(self):
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._http.shutdown()
+        self._http.server_close()
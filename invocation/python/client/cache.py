@@ -0,0 +1,85 @@
+from collections import OrderedDict
+import hashlib
+import re
+import time
+
+MAX_AGE = re.compile(r'max-age\s*=\s*"?(\d+)"?')
+
+
+def freshness(cache_control, default):
+    """How many seconds a response may be reused, by its Cache-Control header.
+
+    no-store and no-cache turn caching off for the response, max-age sets its
+    lifetime, and without either it gets `default`.
+    """
+    if not cache_control:
+        return default
+    directives = cache_control.lower()
+    if 'no-store' in directives or 'no-cache' in directives:
+        return 0
+    if match := MAX_AGE.search(directives):
+        return int(match.group(1))
+    return default
+
+
+class ResponseCache:
+    """A size- and TTL-bounded LRU of successful invocation results.
+
+    Entries are keyed by target app, method and a hash of the payload, so only
+    an identical request to the same method of the same app is answered from
+    it. Each entry lives for as long as the response's Cache-Control allows,
+    but never longer than `ttl`; a response the app marks no-store is not kept.
+    A size of 0 disables the cache.
+    """
+
+    def __init__(self, size=0, ttl=5.0, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "uncacheable": 0, "evictions": 0}
+
+    @staticmethod
+    def key(app_id, method, payload):
+        return app_id, method, hashlib.sha256(payload).hexdigest()
+
+    def lookup(self, key):
+        """Return the cached value for key, or None on a miss."""
+        if not self.size:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        value, expires_at = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            self.counters["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return value
+
+    def put(self, key, value, cache_control=None):
+        if not self.size:
+            return
+        ttl = min(self.ttl, freshness(cache_control, self.ttl))
+        if ttl <= 0:
+            self.counters["uncacheable"] += 1
+            return
+        self._entries[key] = (value, self._clock() + ttl)
+        self._entries.move_to_end(key)
+        self.counters["stored"] += 1
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def stats(self):
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["expired"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "size": self.size,
+            "ttl": self.ttl,
+            "hitRate": self.counters["hits"] / lookups if lookups else 0.0,
+        }
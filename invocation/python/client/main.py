@@ -1,12 +1,23 @@
-from fastapi import FastAPI, HTTPException
+from cache import ResponseCache
+from contextlib import asynccontextmanager
+from dapr.conf import settings
+from dapr.conf.helpers import GrpcEndpoint
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
+from resilience import CircuitOpen, InvocationError, InvocationTimeout, Resilience
+import asyncio
+import grpc
+import httpx
 import logging
-import requests
+import order_pb2
+import order_pb2_grpc
 import os
-
-app = FastAPI()
+import time
 
 logging.basicConfig(level=logging.INFO)
+# httpx logs every request at INFO; the invocation result is logged below.
+logging.getLogger('httpx').setLevel(logging.WARNING)
 
 class Order(BaseModel):
     orderId: int
@@ -15,33 +26,236 @@ class Order(BaseModel):
 base_url = os.getenv('DAPR_HTTP_ENDPOINT', 'http://localhost')
 dapr_api_token = os.getenv('DAPR_API_TOKEN', '')
 invoke_appid = os.getenv('INVOKE_APPID', 'server')
+# 'http' posts JSON to the server's /neworder through the sidecar's HTTP API.
+# 'grpc' calls the server's OrderService/NewOrder with protobuf through the
+# sidecar's gRPC API, which proxies it to a server run as a gRPC app.
+invoke_protocol = os.getenv('INVOKE_PROTOCOL', 'http').lower()
+grpc_endpoint = settings.DAPR_GRPC_ENDPOINT or f'{settings.DAPR_RUNTIME_HOST}:{settings.DAPR_GRPC_PORT}'
+invoke_timeout_ms = float(os.getenv('INVOKE_TIMEOUT_MS', '10000'))
+invoke_connect_timeout_ms = float(os.getenv('INVOKE_CONNECT_TIMEOUT_MS', '2000'))
+invoke_max_connections = int(os.getenv('INVOKE_MAX_CONNECTIONS', '100'))
+invoke_max_keepalive = int(os.getenv('INVOKE_MAX_KEEPALIVE', '100'))
+invoke_keepalive_expiry = float(os.getenv('INVOKE_KEEPALIVE_EXPIRY', '30'))
+# HTTP/2 is negotiated with the sidecar over TLS only (an https endpoint, such
+# as Catalyst's); against a plain http endpoint the client stays on HTTP/1.1.
+invoke_http2 = os.getenv('INVOKE_HTTP2', 'false').lower() == 'true'
+# POST /orders/batch invokes at most this many orders at once, and takes at
+# most invoke_batch_max_orders orders per request.
+invoke_batch_concurrency = int(os.getenv('INVOKE_BATCH_CONCURRENCY', '16'))
+invoke_batch_max_orders = int(os.getenv('INVOKE_BATCH_MAX_ORDERS', '1000'))
+# Orders are keyed by orderId, so invoking the server twice with one is safe
+# and failed invocations are retried. 1 attempt turns retries off.
+invoke_retry_attempts = int(os.getenv('INVOKE_RETRY_ATTEMPTS', '3'))
+invoke_retry_backoff_ms = float(os.getenv('INVOKE_RETRY_BACKOFF_MS', '50'))
+invoke_retry_backoff_max_ms = float(os.getenv('INVOKE_RETRY_BACKOFF_MAX_MS', '1000'))
+# Send a second, identical invocation if the first has not answered within
+# this many milliseconds, and take whichever answers first. 0 turns it off.
+invoke_hedge_after_ms = float(os.getenv('INVOKE_HEDGE_AFTER_MS', '0'))
+invoke_hedge_budget = float(os.getenv('INVOKE_HEDGE_BUDGET', '0.1'))
+invoke_breaker_failures = int(os.getenv('INVOKE_BREAKER_FAILURES', '5'))
+invoke_breaker_reset = float(os.getenv('INVOKE_BREAKER_RESET', '10'))
+# Answer an order the server was invoked with a moment ago from memory rather
+# than invoking it again. Off unless a size is set; the server's Cache-Control
+# can shorten the TTL or rule caching out.
+invoke_cache_size = int(os.getenv('INVOKE_CACHE_SIZE', '0'))
+invoke_cache_ttl = float(os.getenv('INVOKE_CACHE_TTL', '5'))
+
+# gRPC status codes worth trying again; the others mean the call itself was
+# wrong and would fail the same way.
+retryable_grpc_codes = {grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED,
+                        grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.ABORTED,
+                        grpc.StatusCode.INTERNAL, grpc.StatusCode.UNKNOWN}
+
+resilience = Resilience(attempts=invoke_retry_attempts, timeout=invoke_timeout_ms / 1000,
+                        backoff=invoke_retry_backoff_ms / 1000, backoff_max=invoke_retry_backoff_max_ms / 1000,
+                        hedge_after=invoke_hedge_after_ms / 1000 or None, hedge_budget=invoke_hedge_budget,
+                        breaker_failures=invoke_breaker_failures, breaker_reset=invoke_breaker_reset)
+
+response_cache = ResponseCache(size=invoke_cache_size, ttl=invoke_cache_ttl)
+
+# One async HTTP client for the lifetime of the app. Its connections to the
+# sidecar are kept alive and reused across requests, instead of a new TCP (and
+# TLS) handshake per invocation, and waiting on the sidecar never blocks the
+# event loop.
+http_client = None
+
+def new_http_client():
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers={'dapr-api-token': dapr_api_token},
+        http2=invoke_http2,
+        timeout=httpx.Timeout(invoke_timeout_ms / 1000, connect=invoke_connect_timeout_ms / 1000),
+        limits=httpx.Limits(max_connections=invoke_max_connections,
+                            max_keepalive_connections=invoke_max_keepalive,
+                            keepalive_expiry=invoke_keepalive_expiry))
+
+# With INVOKE_PROTOCOL=grpc, one gRPC channel to the sidecar for the lifetime
+# of the app, over which all calls are multiplexed.
+grpc_channel = None
+order_service = None
+
+def new_grpc_channel():
+    endpoint = GrpcEndpoint(grpc_endpoint)
+    if endpoint.tls:
+        return grpc.aio.secure_channel(endpoint.endpoint, grpc.ssl_channel_credentials())
+    return grpc.aio.insecure_channel(endpoint.endpoint)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client, grpc_channel, order_service
+    http_client = new_http_client()
+    if invoke_protocol == 'grpc':
+        grpc_channel = new_grpc_channel()
+        order_service = order_pb2_grpc.OrderServiceStub(grpc_channel)
+    yield
+    if grpc_channel:
+        await grpc_channel.close()
+    await http_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
+
+async def invoke_http(order):
+    headers = {'dapr-app-id': invoke_appid, 'content-type': 'application/json'}
+    try:
+        result = await http_client.post('/neworder', content=order.model_dump_json(), headers=headers)
+    except httpx.TimeoutException as err:
+        raise InvocationTimeout() from err
+    except httpx.HTTPError as err:
+        raise InvocationError(type(err).__name__) from err
+    if not result.is_success:
+        retryable = result.status_code >= 500 or result.status_code == 429
+        raise InvocationError(f'{result.status_code} {result.reason_phrase}', retryable)
+    return result.status_code, result.headers.get('cache-control')
+
+async def invoke_grpc(order):
+    # gRPC proxying: the sidecar routes the call by the dapr-app-id metadata.
+    metadata = [('dapr-app-id', invoke_appid)]
+    if dapr_api_token:
+        metadata.append(('dapr-api-token', dapr_api_token))
+    call = order_service.NewOrder(order_pb2.Order(orderId=order.orderId), metadata=metadata,
+                                  timeout=invoke_timeout_ms / 1000)
+    try:
+        await call
+        # The server sends its Cache-Control as initial metadata.
+        cache_control = (await call.initial_metadata()).get('cache-control')
+    except grpc.aio.AioRpcError as err:
+        if err.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+            raise InvocationTimeout() from err
+        raise InvocationError(err.code().name, err.code() in retryable_grpc_codes) from err
+    return grpc.StatusCode.OK.name, cache_control
+
+async def invoke_order(order):
+    """Invoke the server with one order, with timeouts, retries, hedging and
+    circuit breaking, and return the status it answered with and whether that
+    answer came from the response cache."""
+    invoke, method = (invoke_grpc, 'OrderService/NewOrder') if invoke_protocol == 'grpc' else (invoke_http, 'neworder')
+    key = None
+    if response_cache.size:
+        key = response_cache.key(invoke_appid, method, order.model_dump_json().encode())
+        if (status := response_cache.lookup(key)) is not None:
+            return status, True
+    status, cache_control = await resilience.call(invoke_appid, lambda: invoke(order))
+    if key:
+        response_cache.put(key, status, cache_control)
+    return status, False
 
 @app.post('/order')
 async def send_order(order: Order):
-    headers = {'dapr-app-id': invoke_appid, 'dapr-api-token': dapr_api_token,
-               'content-type': 'application/json'}
     try:
-        result = requests.post(
-            url='%s/neworder' % (base_url),
-            data=order.model_dump_json(),
-            headers=headers
-        )
-
-        if result.ok:
-            logging.info('Invocation successful with status code: %s' %
-                         result.status_code)
-            return {"message": "Invocation successful", "orderId": order.orderId, "targetApp": invoke_appid}
-        else:
-            logging.error(
-                'Error occurred while invoking App ID: %s' % result.reason)
-            raise HTTPException(status_code=500, detail={"error": {"code": "INVOCATION_ERROR", "message": "Failed to invoke service"}})
-
-    except Exception as err:
-        logging.error(f"Error occurred while invoking service: {err}")
+        status, cached = await invoke_order(order)
+    except CircuitOpen:
+        logging.error('Not invoking App ID %s: its circuit is open', invoke_appid)
+        raise HTTPException(status_code=503, detail={"error": {"code": "CIRCUIT_OPEN", "message": "Service is unavailable; try again later"}})
+    except InvocationTimeout:
+        logging.error('Timed out invoking App ID: %s', invoke_appid)
+        raise HTTPException(status_code=504, detail={"error": {"code": "INVOCATION_TIMEOUT", "message": "Timed out invoking service"}})
+    except InvocationError as err:
+        logging.error('Error occurred while invoking App ID: %s', err)
         raise HTTPException(status_code=500, detail={"error": {"code": "INVOCATION_ERROR", "message": "Failed to invoke service"}})
 
+    logging.info('Invocation successful with status code: %s%s', status, ' (cached)' if cached else '')
+    return {"message": "Invocation successful", "orderId": order.orderId, "targetApp": invoke_appid}
+
+async def invoke_timed(order, limit):
+    """Invoke one order of a batch once a slot is free, and time the call."""
+    async with limit:
+        start = time.perf_counter()
+        try:
+            await invoke_order(order)
+            error = None
+        except InvocationError as err:
+            error = str(err)
+        latency_ms = round((time.perf_counter() - start) * 1000, 3)
+    if error:
+        return {"orderId": order.orderId, "status": "error", "error": error, "latencyMs": latency_ms}
+    return {"orderId": order.orderId, "status": "invoked", "latencyMs": latency_ms}
+
+def percentile(ordered, percentile):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))] if ordered else 0
+
+@app.post('/orders/batch')
+async def send_orders(orders: list[Order]):
+    if len(orders) > invoke_batch_max_orders:
+        raise HTTPException(status_code=400, detail={"error": {"code": "BATCH_TOO_LARGE", "message": f"A batch may hold at most {invoke_batch_max_orders} orders"}})
+
+    limit = asyncio.Semaphore(invoke_batch_concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(invoke_timed(order, limit) for order in orders))
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    failed = sum(1 for result in results if result["status"] == "error")
+    latencies = sorted(result["latencyMs"] for result in results)
+    logging.info('Batch invocation finished. %s order(s) invoked, %s failed', len(results) - failed, failed)
+    # 207 Multi-Status: some orders were invoked and some were not, see each result.
+    status_code = 200 if not failed else 207 if failed < len(results) else 500
+    return JSONResponse(status_code=status_code, content={
+        "targetApp": invoke_appid,
+        "results": results,
+        "summary": {"orders": len(results), "failed": failed, "elapsedMs": elapsed_ms,
+                    "p50Ms": percentile(latencies, 50), "p99Ms": percentile(latencies, 99),
+                    "maxMs": latencies[-1] if latencies else 0},
+    })
+
+@app.post('/orders/stream')
+async def stream_orders(request: Request):
+    # The request body is passed on chunk by chunk as it arrives, so the client
+    # holds no more than one chunk of the stream, however long it is. Streams
+    # always go over HTTP, whatever INVOKE_PROTOCOL says.
+    headers = {'dapr-app-id': invoke_appid, 'content-type': 'application/x-ndjson'}
+    try:
+        result = await http_client.post('/neworder/stream', content=request.stream(), headers=headers)
+    except httpx.TimeoutException as err:
+        logging.error('Timed out streaming orders to App ID %s: %r', invoke_appid, err)
+        raise HTTPException(status_code=504, detail={"error": {"code": "INVOCATION_TIMEOUT", "message": "Timed out invoking service"}})
+    except httpx.HTTPError as err:
+        logging.error('Error occurred while streaming orders: %r', err)
+        raise HTTPException(status_code=500, detail={"error": {"code": "INVOCATION_ERROR", "message": "Failed to invoke service"}})
+
+    if result.status_code == 400:
+        # The stream held an invalid order; pass on the server's explanation,
+        # as text if it is not JSON.
+        try:
+            return JSONResponse(status_code=400, content=result.json())
+        except ValueError:
+            return PlainTextResponse(status_code=400, content=result.text)
+    if not result.is_success:
+        logging.error('Error occurred while invoking App ID: %s', result.reason_phrase)
+        raise HTTPException(status_code=500, detail={"error": {"code": "INVOCATION_ERROR", "message": "Failed to invoke service"}})
+
+    received = result.json()["received"]
+    logging.info('Order stream invocation successful. %s order(s) received', received)
+    return {"message": "Invocation successful", "received": received, "targetApp": invoke_appid}
+
+@app.get('/resilience')
+async def read_resilience_stats():
+    return resilience.stats()
+
+@app.get('/cache')
+async def read_cache_stats():
+    return response_cache.stats()
+
 @app.get('/')
 async def read_root():
     health_message = "Health check passed. Everything is running smoothly!"
     logging.info("Health check result: %s", health_message)
-    return {"status": "healthy", "message": health_message}
\ No newline at end of file
+    return {"status": "healthy", "message": health_message}
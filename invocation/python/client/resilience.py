@@ -0,0 +1,181 @@
+import asyncio
+import random
+import time
+
+
+class InvocationError(Exception):
+    """An invocation of the server that did not succeed; str() says why.
+
+    retryable is False when trying again cannot help, such as when the server
+    rejected the request itself.
+    """
+
+    def __init__(self, reason, retryable=True):
+        super().__init__(reason)
+        self.retryable = retryable
+
+
+class InvocationTimeout(InvocationError):
+    def __init__(self, reason='timeout'):
+        super().__init__(reason)
+
+
+class CircuitOpen(InvocationError):
+    """The target app's circuit is open; the call was not attempted."""
+
+    def __init__(self, reason='circuit open'):
+        super().__init__(reason, retryable=False)
+
+
+class CircuitBreaker:
+    """Stops calls to an app that keeps failing, and lets one through now and
+    then to find out whether it has recovered.
+
+    Closed, every call is allowed. After `failures` failures in a row it
+    opens and calls fail at once. Once `reset` seconds have passed, it is half
+    open: a single call is let through, and its outcome closes or reopens the
+    circuit. If that call never reports back, another is let through after a
+    further `reset` seconds.
+    """
+
+    def __init__(self, failures=5, reset=10.0):
+        self.failures = failures
+        self.reset = reset
+        self.state = "closed"
+        self._failed = 0
+        self._opened_at = 0.0
+
+    def allow(self):
+        if self.state == "closed":
+            return True
+        if time.monotonic() - self._opened_at >= self.reset:
+            self.state = "half_open"
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self._failed = 0
+
+    def record_failure(self):
+        """Count a failure; return True if it opened the circuit."""
+        self._failed += 1
+        if self.state == "half_open" or (self.state == "closed" and self._failed >= self.failures):
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+
+class Resilience:
+    """Timeouts, retries, hedging and circuit breaking for calls to other apps.
+
+    call() makes up to `attempts` attempts, each limited to `timeout` seconds,
+    retrying only failures that are retryable, and only for idempotent calls.
+    Between attempts it sleeps a random time between zero and an exponential
+    backoff (full jitter), so callers that failed together do not retry
+    together.
+
+    With hedge_after set, an idempotent attempt still running after that many
+    seconds is raced against a second, identical one; the first to succeed
+    wins and the other is cancelled. That trims the latency tail caused by an
+    occasional slow replica at the cost of an extra call. hedge_budget caps
+    hedges at that share of calls, so when the target is slow across the
+    board hedging does not double the load on it.
+
+    Every target app has its own circuit breaker, checked before each attempt.
+    """
+
+    def __init__(self, attempts=3, timeout=10.0, backoff=0.05, backoff_max=1.0, hedge_after=None,
+                 hedge_budget=0.1, breaker_failures=5, breaker_reset=10.0):
+        self.attempts = max(1, attempts)
+        self.timeout = timeout
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.hedge_budget = hedge_budget
+        self.breaker_failures = breaker_failures
+        self.breaker_reset = breaker_reset
+        self._breakers = {}
+        self._counters = {}
+
+    def _target(self, app_id):
+        if app_id not in self._breakers:
+            self._breakers[app_id] = CircuitBreaker(self.breaker_failures, self.breaker_reset)
+            self._counters[app_id] = {"calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "timeouts": 0,
+                                      "hedges": 0, "hedgeWins": 0, "shortCircuited": 0, "circuitOpened": 0}
+        return self._breakers[app_id], self._counters[app_id]
+
+    async def call(self, app_id, attempt, idempotent=True):
+        """Run attempt() against app_id under the policy and return its result."""
+        breaker, counters = self._target(app_id)
+        counters["calls"] += 1
+        attempts = self.attempts if idempotent else 1
+        for number in range(attempts):
+            if not breaker.allow():
+                counters["shortCircuited"] += 1
+                counters["failed"] += 1
+                raise CircuitOpen()
+            try:
+                if idempotent and self.hedge_after:
+                    result = await self._hedged(attempt, counters)
+                else:
+                    result = await self._timed(attempt, counters)
+            except InvocationError as err:
+                if err.retryable and breaker.record_failure():
+                    counters["circuitOpened"] += 1
+                if not err.retryable or number == attempts - 1:
+                    counters["failed"] += 1
+                    raise
+                counters["retries"] += 1
+                await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff * 2 ** number)))
+                continue
+            breaker.record_success()
+            counters["succeeded"] += 1
+            return result
+
+    async def _timed(self, attempt, counters):
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await attempt()
+        except TimeoutError:
+            counters["timeouts"] += 1
+            raise InvocationTimeout()
+        except InvocationTimeout:
+            counters["timeouts"] += 1
+            raise
+
+    async def _hedged(self, attempt, counters):
+        first = asyncio.ensure_future(self._timed(attempt, counters))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done or counters["hedges"] >= self.hedge_budget * counters["calls"]:
+            return await first
+        counters["hedges"] += 1
+        hedge = asyncio.ensure_future(self._timed(attempt, counters))
+        pending = {first, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # exception() on every finished attempt, so a failure that lost
+                # the race is not reported as never retrieved.
+                failures = [task.exception() for task in done]
+                for task, failure in zip(done, failures):
+                    if failure is None:
+                        if task is hedge:
+                            counters["hedgeWins"] += 1
+                        return task.result()
+            # Both failed; report the one that failed last.
+            raise failures[-1]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self):
+        return {
+            "attempts": self.attempts,
+            "timeoutMs": self.timeout * 1000,
+            "hedgeAfterMs": self.hedge_after * 1000 if self.hedge_after else None,
+            "apps": {app_id: {**self._counters[app_id], "circuit": breaker.state}
+                     for app_id, breaker in self._breakers.items()},
+        }
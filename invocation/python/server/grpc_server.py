@@ -0,0 +1,43 @@
+"""The server app as a gRPC app: the same order method, as OrderService/NewOrder.
+
+Run it in place of main:app with appProtocol: grpc, as in
+invocation-quickstart-grpc.yaml. The sidecar proxies the client's gRPC calls to
+it unchanged.
+
+    uv run python grpc_server.py
+"""
+
+import asyncio
+import logging
+import os
+
+import grpc
+import order_pb2
+import order_pb2_grpc
+
+logging.basicConfig(level=logging.INFO)
+
+app_port = int(os.getenv('APP_PORT', '5002'))
+order_cache_max_age = int(os.getenv('ORDER_CACHE_MAX_AGE', '60'))
+order_cache_control = f'max-age={order_cache_max_age}' if order_cache_max_age > 0 else 'no-store'
+
+
+class OrderService(order_pb2_grpc.OrderServiceServicer):
+    async def NewOrder(self, request, context):
+        logging.info('Invocation received with data: orderId=%s', request.orderId)
+        # The HTTP app's Cache-Control header, as initial metadata.
+        await context.send_initial_metadata((('cache-control', order_cache_control),))
+        return order_pb2.OrderReply(orderId=request.orderId, message="Order received successfully")
+
+
+async def serve():
+    server = grpc.aio.server()
+    order_pb2_grpc.add_OrderServiceServicer_to_server(OrderService(), server)
+    server.add_insecure_port(f'127.0.0.1:{app_port}')
+    await server.start()
+    logging.info('gRPC server listening on port %s', app_port)
+    await server.wait_for_termination()
+
+
+if __name__ == '__main__':
+    asyncio.run(serve())
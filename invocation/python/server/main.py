@@ -1,20 +1,72 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 import logging
-from fastapi import FastAPI
+import os
+from fastapi import FastAPI, HTTPException, Request, Response
 
 app = FastAPI()
 
 logging.basicConfig(level=logging.INFO)
 
+# The longest line /neworder/stream accepts. Only one partial line is held in
+# memory at a time, so this, not the size of the stream, bounds its memory.
+order_stream_max_line_bytes = int(os.getenv('ORDER_STREAM_MAX_LINE_BYTES', str(1024 * 1024)))
+# Orders are keyed by orderId, so the same order sent again gets the same
+# answer; callers may reuse it for this many seconds. 0 asks them not to.
+order_cache_max_age = int(os.getenv('ORDER_CACHE_MAX_AGE', '60'))
+order_cache_control = f'max-age={order_cache_max_age}' if order_cache_max_age > 0 else 'no-store'
+
 
 class Order(BaseModel):
     orderId: int
 
 @app.post('/neworder')
-def receive_order(order: Order):
-    logging.info('Invocation received with data: ' + str(order))
+async def receive_order(order: Order, response: Response):
+    logging.info('Invocation received with data: %s', order)
+    response.headers['Cache-Control'] = order_cache_control
     return {"message": "Order received successfully", "orderId": order.orderId}
 
+class LineTooLong(Exception):
+    pass
+
+async def ndjson_lines(chunks):
+    """Split a stream of byte chunks into lines as the chunks arrive."""
+    pending = b''
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            if len(line) > order_stream_max_line_bytes:
+                raise LineTooLong()
+            yield line
+        if len(pending) > order_stream_max_line_bytes:
+            raise LineTooLong()
+    if pending:
+        yield pending
+
+def invalid_order(line_number, received):
+    # Orders before the bad line have been received; the caller can resend the
+    # stream from that line on.
+    logging.error('Order stream stopped at line %s after %s order(s)', line_number, received)
+    raise HTTPException(status_code=400, detail={"error": {"code": "INVALID_ORDER", "message": f"Line {line_number} is not a valid order; {received} order(s) before it were received"}})
+
+@app.post('/neworder/stream')
+async def receive_orders(request: Request):
+    received, line_number = 0, 0
+    try:
+        async for line in ndjson_lines(request.stream()):
+            line_number += 1
+            if not line.strip():
+                continue
+            order = Order.model_validate_json(line)
+            logging.info('Invocation received with data: %s', order)
+            received += 1
+    except ValidationError:
+        invalid_order(line_number, received)
+    except LineTooLong:
+        invalid_order(line_number + 1, received)
+    logging.info('Order stream received. %s order(s)', received)
+    return {"message": "Orders received successfully", "received": received}
+
 @app.get('/')
 async def read_root():
     health_message = "Health check passed. Everything is running smoothly!"
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: order.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'order.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0border.proto\x12\torders.v1\"\x18\n\x05Order\x12\x0f\n\x07orderId\x18\x01 \x01(\x03\".\n\nOrderReply\x12\x0f\n\x07orderId\x18\x01 \x01(\x03\x12\x0f\n\x07message\x18\x02 \x01(\t2C\n\x0cOrderService\x12\x33\n\x08NewOrder\x12\x10.orders.v1.Order\x1a\x15.orders.v1.OrderReplyb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'order_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_ORDER']._serialized_start=26
+  _globals['_ORDER']._serialized_end=50
+  _globals['_ORDERREPLY']._serialized_start=52
+  _globals['_ORDERREPLY']._serialized_end=98
+  _globals['_ORDERSERVICE']._serialized_start=100
+  _globals['_ORDERSERVICE']._serialized_end=167
+# @@protoc_insertion_point(module_scope)
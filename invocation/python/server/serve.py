@@ -0,0 +1,138 @@
+"""Run the server app in several worker processes that share one port.
+
+Each worker is a uvicorn server in a process of its own, with its own event
+loop, so the app can use more than one CPU core. Every worker opens its own
+listening socket on the same port with SO_REUSEPORT. On Linux the kernel
+spreads incoming connections across those sockets, so there is no shared
+accept queue for the workers to contend on, and a slow worker only holds up
+its own connections. Other systems accept SO_REUSEPORT but may hand every
+connection to one socket.
+
+SERVER_WORKERS defaults to 1. Set it to a number, or to `auto` for one worker
+per CPU the process may use, counting a cgroup CPU quota such as a container
+limit. A worker that exits unexpectedly is restarted, unless workers keep
+exiting as soon as they start, such as when the port is taken; the supervisor
+then gives up with an error. SIGINT or SIGTERM stops them all. Where
+SO_REUSEPORT is unavailable, as on Windows, one worker is run.
+
+    SERVER_WORKERS=4 uv run python serve.py
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+logging.basicConfig(level=logging.INFO)
+
+app_host = os.getenv('APP_HOST', '127.0.0.1')
+app_port = int(os.getenv('APP_PORT', '5002'))
+server_workers = os.getenv('SERVER_WORKERS', '1')
+server_log_level = os.getenv('SERVER_LOG_LEVEL', 'info')
+# A worker that exits within this many seconds of starting failed to start;
+# after this many such failures in a row the supervisor stops.
+startup_grace = 5.0
+max_startup_failures = 5
+
+
+def available_cpus():
+    """CPUs this process may run on, capped by a cgroup v2 CPU quota.
+    os.cpu_count() counts every CPU of the machine, however few the process
+    is allowed to use."""
+    if hasattr(os, 'process_cpu_count'):
+        cpus = os.process_cpu_count() or 1
+    elif hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def listen():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((app_host, app_port))
+    sock.listen(2048)
+    return sock
+
+
+def run_worker():
+    # The supervisor handles SIGINT for everyone; a worker stops on SIGTERM.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    config = uvicorn.Config('main:app', log_level=server_log_level)
+    uvicorn.Server(config).run(sockets=[listen()])
+
+
+def start_worker():
+    process = multiprocessing.Process(target=run_worker)
+    process.start()
+    process.started_at = time.monotonic()
+    return process
+
+
+def main():
+    requested = available_cpus() if server_workers == 'auto' else int(server_workers)
+    workers = requested if hasattr(socket, 'SO_REUSEPORT') else 1
+    if workers != requested:
+        logging.warning('SO_REUSEPORT is not available here; running 1 worker instead of %s', requested)
+    # Fail fast, in the supervisor, if the address cannot be bound at all.
+    try:
+        listen().close()
+    except OSError as err:
+        logging.error('Cannot listen on %s:%s: %s', app_host, app_port, err)
+        sys.exit(1)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    processes = [start_worker() for _ in range(workers)]
+    logging.info('Serving on %s:%s with %s worker(s)', app_host, app_port, workers)
+
+    startup_failures = 0
+    while not stopping:
+        for n, process in enumerate(processes):
+            if process.is_alive():
+                continue
+            if time.monotonic() - process.started_at < startup_grace:
+                startup_failures += 1
+            else:
+                startup_failures = 0
+            if startup_failures >= max_startup_failures:
+                logging.error('Workers keep exiting as soon as they start; giving up')
+                stopping = True
+                break
+            logging.error('Worker %s exited with code %s; restarting it', process.pid, process.exitcode)
+            processes[n] = start_worker()
+        time.sleep(0.5)
+
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+    if startup_failures >= max_startup_failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Measure publish throughput of the batching publisher at different batch sizes.
+
+Many concurrent producers publish orders through one BatchPublisher, as the
+publisher app's requests do, against a local sidecar stand-in with a simulated
+per-call latency. For each batch size it prints messages/s, the number of
+sidecar calls made and the p50/p99 time a producer waited for its publish. A
+batch size of 1 is the unbatched baseline: one publish_event per message.
+With --keys, messages carry a partitionKey cycling over that many keys, which
+splits each batch into one bulk publish per key.
+
+    uv run python benchmarks/bench_batching.py --batch-sizes 1 10 100 500
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+# The benchmark imports the publisher's own modules.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'publisher'))
+
+from batcher import BatchPublisher
+from dapr.aio.clients import DaprClient
+from sidecar import LocalSidecar
+
+
+async def run(batch_size, sidecar, args):
+    client = DaprClient()
+    publisher = BatchPublisher(client, 'pubsub', 'orders', max_batch=batch_size,
+                               linger=args.linger_ms / 1000, max_in_flight=args.in_flight)
+    publisher.start()
+    calls_before = sidecar.servicer.calls
+    latencies = []
+
+    async def producer(n):
+        for i in range(args.messages):
+            start = time.perf_counter()
+            order_id = n * args.messages + i
+            # Each producer stands for one customer publishing its orders in turn.
+            metadata = {'partitionKey': str(n % args.keys)} if args.keys else None
+            await publisher.publish(f'{{"orderId":{order_id}}}', metadata)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(producer(n) for n in range(args.producers)))
+    elapsed = time.perf_counter() - start
+    await publisher.stop()
+    await client.close()
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'batch {batch_size:>5} {len(latencies) / elapsed:>9.0f} msgs/s   '
+          f'sidecar calls {sidecar.servicer.calls - calls_before:>6}   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--producers', type=int, default=500, help='concurrent publishers')
+    parser.add_argument('--messages', type=int, default=40, help='messages per producer')
+    parser.add_argument('--linger-ms', type=float, default=5)
+    parser.add_argument('--keys', type=int, default=0, help='distinct partition keys; 0 for none')
+    parser.add_argument('--in-flight', type=int, default=8, help='concurrent batches per publisher')
+    parser.add_argument('--latency-ms', type=float, default=2,
+                        help='simulated sidecar latency per call')
+    args = parser.parse_args()
+
+    sidecar = LocalSidecar(latency_ms=args.latency_ms)
+    sidecar.start()
+    try:
+        for batch_size in args.batch_sizes:
+            asyncio.run(run(batch_size, sidecar, args))
+    finally:
+        sidecar.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Compare per-message and bulk delivery of orders to the subscriber.
+
+Launches the subscriber app under uvicorn and plays the part of the sidecar:
+it delivers the same number of orders once as one CloudEvent per request to
+/neworder, and once as bulk messages of each given size to /neworder/bulk,
+from a number of concurrent connections. Prints delivered orders/s for each.
+
+    uv run python benchmarks/bench_delivery.py --orders 20000 --bulk-sizes 10 100
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import aiohttp
+
+SUBSCRIBER_DIR = Path(__file__).resolve().parent.parent / 'subscriber'
+PORT = 5012
+
+
+def cloud_event(order_id):
+    return {
+        "datacontenttype": "application/json",
+        "source": "publisher",
+        "topic": "orders",
+        "pubsubname": "pubsub",
+        "data": {"orderId": order_id},
+        "id": str(uuid.uuid4()),
+        "specversion": "1.0",
+        "tracestate": "",
+        "type": "com.dapr.event.sent",
+        "traceid": "00-00000000000000000000000000000000-0000000000000000-00",
+    }
+
+
+def bulk_message(order_ids):
+    return {
+        "entries": [{"entryId": str(n), "event": cloud_event(order_id),
+                     "contentType": "application/cloudevents+json", "metadata": {}}
+                    for n, order_id in enumerate(order_ids)],
+        "id": str(uuid.uuid4()),
+        "pubsubname": "pubsub",
+        "topic": "orders",
+        "type": "com.dapr.event.sent.bulk",
+        "metadata": {},
+    }
+
+
+async def wait_until_healthy(session, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f'{url} did not become healthy')
+
+
+async def deliver(session, url, bodies, connections):
+    """POST every body, from connections concurrent senders. Returns the
+    number of orders the subscriber acknowledged and the elapsed time."""
+    queue = list(reversed(bodies))
+    acknowledged = 0
+
+    async def sender():
+        nonlocal acknowledged
+        while queue:
+            body = queue.pop()
+            async with session.post(url, data=body, headers={'Content-Type': 'application/json'}) as response:
+                result = await response.json()
+                if response.status != 200:
+                    continue
+                statuses = result.get('statuses')
+                acknowledged += sum(s['status'] == 'SUCCESS' for s in statuses) if statuses else 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(connections)))
+    return acknowledged, time.perf_counter() - start
+
+
+async def bench(args):
+    base_url = f'http://127.0.0.1:{PORT}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(PORT), '--log-level', 'warning'],
+        cwd=SUBSCRIBER_DIR, env={**os.environ, 'DEAD_LETTER_FILE': os.devnull}, stderr=subprocess.DEVNULL)
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            await wait_until_healthy(session, f'{base_url}/')
+            bodies = [json.dumps(cloud_event(n)) for n in range(args.orders)]
+            acknowledged, elapsed = await deliver(session, f'{base_url}/neworder', bodies, args.connections)
+            print(f'per-message       {acknowledged / elapsed:>9.0f} orders/s   {len(bodies):>6} requests')
+            for size in args.bulk_sizes:
+                bodies = [json.dumps(bulk_message(range(n, min(n + size, args.orders))))
+                          for n in range(0, args.orders, size)]
+                acknowledged, elapsed = await deliver(session, f'{base_url}/neworder/bulk', bodies, args.connections)
+                print(f'bulk of {size:<9} {acknowledged / elapsed:>9.0f} orders/s   {len(bodies):>6} requests')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--bulk-sizes', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--connections', type=int, default=16, help='concurrent deliveries')
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == '__main__':
+    main()
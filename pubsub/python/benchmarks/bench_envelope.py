@@ -0,0 +1,60 @@
+"""Measure the CPU cost per message of reading the order id out of a delivery.
+
+Compares, on the same bodies and in-process:
+
+- cloudevent-model: validating the body against the subscriber's CloudEvent
+  pydantic model, as /neworder does
+- lazy-cloudevent: reading data from a LazyEnvelope over the same CloudEvent,
+  as /neworder/raw does
+- lazy-raw: a LazyEnvelope over the bare order JSON of a raw payload
+
+Prints microseconds of CPU time per message for each.
+
+    uv run python benchmarks/bench_envelope.py --messages 200000
+"""
+
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+# The benchmark imports the subscriber's own modules.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'subscriber'))
+
+from bench_delivery import cloud_event
+from envelope import LazyEnvelope
+from main import CloudEvent, order_id_of
+
+
+def cloudevent_model(body):
+    # FastAPI decodes the JSON body first, then validates the result.
+    return order_id_of(CloudEvent.model_validate(json.loads(body)).data)
+
+
+def lazy_envelope(body):
+    return order_id_of(LazyEnvelope(body).data)
+
+
+def measure(name, read, bodies):
+    start = time.process_time()
+    for body in bodies:
+        read(body)
+    per_message = (time.process_time() - start) / len(bodies) * 1e6
+    print(f'{name:<17} {per_message:>7.2f} us/message')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200000)
+    args = parser.parse_args()
+
+    events = [json.dumps(cloud_event(n)).encode() for n in range(args.messages)]
+    raw = [json.dumps({"orderId": n}).encode() for n in range(args.messages)]
+    measure('cloudevent-model', cloudevent_model, events)
+    measure('lazy-cloudevent', lazy_envelope, events)
+    measure('lazy-raw', lazy_envelope, raw)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Measure publish-to-receive latency and throughput end to end, locally.
+
+Starts the local sidecar stand-in as an in-memory pubsub that delivers to the
+subscriber, launches the publisher (with TRACE_LATENCY=true) and the
+subscriber under uvicorn, and publishes orders through POST /order at a fixed
+rate. Each order carries the time it was published; the subscriber records
+the time it took to arrive in its latency histogram. At the end the histogram
+is fetched from GET /latency/dump, printed as a summary, and written to a
+JSON file for comparing runs. No Catalyst project is needed.
+
+    uv run python benchmarks/bench_latency.py --rate 2000 --duration 10 --output latency.json
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+from sidecar import LocalSidecar
+
+APP_DIR = Path(__file__).resolve().parent.parent
+PUBLISHER_PORT = 5013
+SUBSCRIBER_PORT = 5014
+
+
+async def wait_until_healthy(session, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f'{url} did not become healthy')
+
+
+def launch(directory, port, env):
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR / directory, env=env, stderr=subprocess.DEVNULL)
+
+
+async def publish_at_rate(session, url, rate, duration):
+    """Open loop: publish on schedule whether or not earlier publishes are done,
+    so a slow system shows up as latency rather than as a lower send rate."""
+    sent, failed = 0, 0
+    pending = set()
+
+    async def publish(order_id):
+        nonlocal failed
+        try:
+            async with session.post(url, json={'orderId': order_id}) as response:
+                await response.read()
+                if response.status != 201:
+                    failed += 1
+        except aiohttp.ClientError:
+            failed += 1
+
+    start = time.monotonic()
+    while (elapsed := time.monotonic() - start) < duration:
+        due = int(elapsed * rate)
+        while sent < due:
+            sent += 1
+            task = asyncio.create_task(publish(sent))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*pending)
+    return sent, failed
+
+
+async def bench(sidecar, args):
+    env = {**os.environ, **sidecar.environ(), 'TRACE_LATENCY': 'true',
+           'PUBLISH_LINGER_MS': str(args.linger_ms)}
+    subscriber = launch('subscriber', SUBSCRIBER_PORT, {**env, 'DEAD_LETTER_FILE': os.devnull})
+    publisher = launch('publisher', PUBLISHER_PORT, env)
+    subscriber_url = f'http://127.0.0.1:{SUBSCRIBER_PORT}'
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            await wait_until_healthy(session, f'{subscriber_url}/')
+            await wait_until_healthy(session, f'http://127.0.0.1:{PUBLISHER_PORT}/')
+            await session.delete(f'{subscriber_url}/latency')
+
+            start = time.monotonic()
+            sent, failed = await publish_at_rate(session, f'http://127.0.0.1:{PUBLISHER_PORT}/order',
+                                                 args.rate, args.duration)
+            # Let the in-memory pubsub drain before reading the histogram.
+            deadline = time.monotonic() + 30
+            while sidecar.servicer.delivered + sidecar.servicer.delivery_failures < sent - failed \
+                    and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            elapsed = time.monotonic() - start
+
+            async with session.get(f'{subscriber_url}/latency/dump') as response:
+                histogram = await response.json()
+    finally:
+        publisher.terminate()
+        subscriber.terminate()
+        publisher.wait()
+        subscriber.wait()
+
+    print(f'published {sent - failed}/{sent}   delivered {sidecar.servicer.delivered} '
+          f'({sidecar.servicer.delivered / elapsed:.0f} orders/s)   '
+          f'delivery failures {sidecar.servicer.delivery_failures}')
+    print('latency us   ' + '   '.join(f'{name} {histogram[name]:.0f}' for name in
+                                       ('min', 'mean', 'p50', 'p90', 'p99', 'p99.9', 'max')))
+    if args.output:
+        Path(args.output).write_text(json.dumps({"rate": args.rate, "duration": args.duration,
+                                                 "latency": histogram}, indent=2))
+        print(f'histogram written to {args.output}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=1000, help='orders published per second')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to publish for')
+    parser.add_argument('--linger-ms', type=float, default=5, help='PUBLISH_LINGER_MS for the publisher')
+    parser.add_argument('--latency-ms', type=float, default=0.5,
+                        help='simulated sidecar latency per publish call')
+    parser.add_argument('--output', help='write the full histogram to this JSON file')
+    args = parser.parse_args()
+
+    sidecar = LocalSidecar(latency_ms=args.latency_ms,
+                           deliver_to=f'http://127.0.0.1:{SUBSCRIBER_PORT}/neworder')
+    sidecar.start()
+    try:
+        asyncio.run(bench(sidecar, args))
+    finally:
+        sidecar.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""A local stand-in for the Dapr sidecar, for benchmarks only.
+
+Accepts the gRPC publish APIs the publisher calls and counts what it is given,
+and serves the HTTP health endpoint every DaprClient polls before it dials its
+channel. An optional per-call latency approximates the network hop to a real
+sidecar and broker.
+
+Given a deliver_to URL it also acts as an in-memory pubsub: every accepted
+message is wrapped in a CloudEvent and POSTed to that URL, as the subscriber's
+sidecar would, from a pool of delivery threads.
+
+    sidecar = LocalSidecar(latency_ms=1)
+    sidecar.start()   # points dapr.conf.settings at it
+    ...
+    sidecar.stop()
+"""
+
+from concurrent import futures
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import json
+import threading
+import time
+import uuid
+
+import grpc
+from dapr.conf import settings
+from dapr.proto import api_service_v1, api_v1
+from google.protobuf import empty_pb2
+
+
+class InMemoryDapr(api_service_v1.DaprServicer):
+    def __init__(self, latency_ms=0.0, deliver_to=None, delivery_threads=16):
+        self.latency_s = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.messages = []  # (topic, data, metadata) in the order accepted
+        self.delivered = 0
+        self.delivery_failures = 0
+        self._deliver_to = urlsplit(deliver_to) if deliver_to else None
+        self._delivery = futures.ThreadPoolExecutor(max_workers=delivery_threads) if deliver_to else None
+        self._connections = threading.local()
+
+    def _accept(self, topic, data, metadata):
+        self.messages.append((topic, data, metadata))
+        if self._delivery:
+            self._delivery.submit(self._deliver, topic, data)
+
+    def _deliver(self, topic, data):
+        event = {
+            "specversion": "1.0", "id": str(uuid.uuid4()), "source": "publisher",
+            "type": "com.dapr.event.sent", "topic": topic, "pubsubname": "pubsub",
+            "datacontenttype": "application/json", "data": json.loads(data),
+            "traceid": "", "tracestate": "",
+        }
+        connection = getattr(self._connections, 'connection', None)
+        if connection is None:
+            connection = self._connections.connection = HTTPConnection(self._deliver_to.netloc)
+        try:
+            connection.request('POST', self._deliver_to.path, body=json.dumps(event),
+                               headers={'Content-Type': 'application/cloudevents+json'})
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except OSError:
+            self._connections.connection = None
+            ok = False
+        with self.lock:
+            if ok:
+                self.delivered += 1
+            else:
+                self.delivery_failures += 1
+
+    def _hop(self):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def GetMetadata(self, request, context):
+        return api_v1.GetMetadataResponse(id='publisher')
+
+    def PublishEvent(self, request, context):
+        self._hop()
+        with self.lock:
+            self.calls += 1
+            self._accept(request.topic, request.data, dict(request.metadata))
+        return empty_pb2.Empty()
+
+    def BulkPublishEvent(self, request, context):
+        self._hop()
+        with self.lock:
+            self.calls += 1
+            for entry in request.entries:
+                self._accept(request.topic, entry.event, {**request.metadata, **entry.metadata})
+        return api_v1.BulkPublishResponse()
+
+    BulkPublishEventAlpha1 = BulkPublishEvent
+
+
+class _Health(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalSidecar:
+    def __init__(self, latency_ms=0.0, workers=32, deliver_to=None):
+        self.servicer = InMemoryDapr(latency_ms, deliver_to)
+        self._grpc = grpc.server(futures.ThreadPoolExecutor(max_workers=workers))
+        api_service_v1.add_DaprServicer_to_server(self.servicer, self._grpc)
+        self.grpc_port = self._grpc.add_insecure_port('127.0.0.1:0')
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), _Health)
+        self.http_port = self._http.server_address[1]
+
+    def start(self):
+        self._grpc.start()
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+        for name, value in self.environ().items():
+            setattr(settings, name, value)
+
+    def environ(self):
+        """Environment variables that point a separately started app at this sidecar."""
+        return {
+            'DAPR_GRPC_ENDPOINT': f'127.0.0.1:{self.grpc_port}',
+            'DAPR_HTTP_ENDPOINT': f'http://127.0.0.1:{self.http_port}',
+        }
+
+    def stop(self):
+        self._http.shutdown()
+        self._grpc.stop(grace=None)
+        if self.servicer._delivery:
+            self.servicer._delivery.shutdown(cancel_futures=True)
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import grpc
+
+
+class PublishError(Exception):
+    """The sidecar did not accept a message. Raised to the caller of publish()."""
+
+
+class BatchPublisher:
+    """Collects messages published from many requests into bulk publishes.
+
+    publish() queues a message and waits until the batch it lands in has been
+    accepted by the sidecar, so a caller only reports success for a message the
+    broker has. A batch is flushed as soon as it holds max_batch messages, or
+    linger seconds after its first message arrived, whichever comes first. Up
+    to max_in_flight batches are published concurrently.
+
+    Messages can carry their own publish metadata, such as a partitionKey.
+    The bulk publish API takes metadata per request, not per message, so a
+    batch is sent as one bulk publish per distinct set of metadata, and
+    batching pays off only as far as messages share it. Messages with the same
+    metadata keep their order within a batch, and a caller that waits for each
+    publish before the next gets its messages published in order.
+
+    publish_events does not report which entry of a batch failed, only that
+    some did, so a partly failed batch fails every message in it. Callers may
+    then retry messages the broker already has; delivery is at-least-once
+    either way.
+    """
+
+    def __init__(self, client, pubsub_name, topic_name, max_batch=100, linger=0.005, max_in_flight=8,
+                 metadata=None):
+        self._client = client
+        self._pubsub_name = pubsub_name
+        self._topic_name = topic_name
+        self._metadata = metadata or {}
+        self.max_batch = max(1, max_batch)
+        self.linger = linger
+        self._queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._flushes = set()
+        self._collector = None
+
+    def start(self):
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Publish whatever is still queued, then stop."""
+        await self._queue.put(None)
+        await self._collector
+        await asyncio.gather(*self._flushes)
+
+    async def publish(self, data, metadata=None):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((data, metadata or {}, future))
+        await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except TimeoutError:
+                        break
+                if item is None:
+                    # Stopping: flush this last batch, then let stop() wait for it.
+                    await self._queue.put(None)
+                    break
+                batch.append(item)
+            await self._in_flight.acquire()
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        try:
+            groups = {}
+            for data, metadata, future in batch:
+                groups.setdefault(tuple(sorted(metadata.items())), []).append((data, future))
+            await asyncio.gather(*(self._publish(dict(metadata), group) for metadata, group in groups.items()))
+        finally:
+            self._in_flight.release()
+
+    async def _publish(self, metadata, group):
+        data = [data for data, _ in group]
+        metadata = {**self._metadata, **metadata}
+        # Every future in the group is resolved below whatever happens here,
+        # including cancellation, so no caller of publish() waits for ever.
+        error = PublishError('publish cancelled')
+        try:
+            if len(data) == 1:
+                await self._client.publish_event(
+                    pubsub_name=self._pubsub_name, topic_name=self._topic_name,
+                    data=data[0], data_content_type='application/json', publish_metadata=metadata)
+                failed = 0
+            else:
+                response = await self._client.publish_events(
+                    pubsub_name=self._pubsub_name, topic_name=self._topic_name,
+                    data=data, data_content_type='application/json', publish_metadata=metadata)
+                failed = len(response.failed_entries)
+            if failed:
+                logging.error('%s of %s message(s) in a bulk publish failed', failed, len(group))
+            error = PublishError(f'{failed} of {len(group)} messages failed') if failed else None
+        except grpc.RpcError as err:
+            logging.error('Error occurred while publishing %s message(s): %s', len(group), err.code())
+            error = PublishError(f'publish failed: {err.code()}')
+        except Exception as err:
+            logging.error('Error occurred while publishing %s message(s): %r', len(group), err)
+            error = PublishError(f'publish failed: {err!r}')
+        finally:
+            for _, future in group:
+                if future.done():
+                    continue
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
@@ -1,37 +1,74 @@
-from dapr.clients import DaprClient
-from cloudevents.sdk.event import v1
+from batcher import BatchPublisher, PublishError
+from contextlib import asynccontextmanager
+from dapr.aio.clients import DaprClient
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+import json
 import logging
 import os
-
-app = FastAPI()
+import time
 
 logging.basicConfig(level=logging.INFO)
 
 class Order(BaseModel):
     orderId: int
+    customerId: int | None = None
 
 pubsub_name = os.getenv('PUBSUB_NAME', 'pubsub')
 topic_name = os.getenv('TOPIC_NAME', 'orders')
+publish_batch_size = int(os.getenv('PUBLISH_BATCH_SIZE', '100'))
+publish_linger_ms = float(os.getenv('PUBLISH_LINGER_MS', '5'))
+publish_max_in_flight = int(os.getenv('PUBLISH_MAX_IN_FLIGHT', '8'))
+# Publish the bare order JSON instead of wrapping it in a CloudEvent. Pair it
+# with subscription-raw.yaml on the subscriber side.
+publish_raw_payload = os.getenv('PUBLISH_RAW_PAYLOAD', 'false').lower() == 'true'
+# The order field whose value becomes the partitionKey of the message, so all
+# orders with the same value land on the same broker partition, in order.
+# Orders without the field use their orderId. Unset publishes without one.
+partition_key_field = os.getenv('PARTITION_KEY_FIELD', '')
+# Stamp every order with the time it was published, in nanoseconds since the
+# epoch, so the subscriber can measure publish-to-receive latency. Only
+# meaningful when both apps share a clock, as in a local benchmark.
+trace_latency = os.getenv('TRACE_LATENCY', 'false').lower() == 'true'
+
+# One async Dapr client and one batching publisher for the lifetime of the
+# app. Orders published by concurrent requests share bulk publishes instead of
+# each paying its own round-trip to the sidecar.
+publisher = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global publisher
+    client = DaprClient()
+    publisher = BatchPublisher(client, pubsub_name, topic_name, max_batch=publish_batch_size,
+                               linger=publish_linger_ms / 1000, max_in_flight=publish_max_in_flight,
+                               metadata={'rawPayload': 'true'} if publish_raw_payload else None)
+    publisher.start()
+    yield
+    await publisher.stop()
+    await client.close()
+
+app = FastAPI(lifespan=lifespan)
+
+def partition_metadata(order):
+    if not partition_key_field:
+        return None
+    key = getattr(order, partition_key_field, None)
+    return {'partitionKey': str(order.orderId if key is None else key)}
+
+def order_payload(order):
+    if not trace_latency:
+        return order.model_dump_json(exclude_none=True)
+    return json.dumps({**order.model_dump(exclude_none=True), "sentAtNs": time.time_ns()}, separators=(',', ':'))
 
 @app.post('/order', status_code=201)
 async def publish_orders(order: Order):
-    with DaprClient() as d:
-        try:
-            result = d.publish_event(
-                pubsub_name=pubsub_name,
-                topic_name=topic_name,
-                data=order.model_dump_json(),
-                data_content_type='application/json',
-            )
-            logging.info('Publish successful. Order published: %s' %
-                         order.orderId)
-            return {"id": order.orderId, "message": "Message published successfully", "topic": "orders"}
-        except grpc.RpcError as err:
-            logging.error(
-                f"Error occurred while publishing order: {err.code()}")
-            raise HTTPException(status_code=500, detail={"error": {"code": "PUBLISH_ERROR", "message": "Failed to publish message"}})
+    try:
+        await publisher.publish(order_payload(order), partition_metadata(order))
+    except PublishError:
+        raise HTTPException(status_code=500, detail={"error": {"code": "PUBLISH_ERROR", "message": "Failed to publish message"}})
+    logging.info('Publish successful. Order published: %s', order.orderId)
+    return {"id": order.orderId, "message": "Message published successfully", "topic": "orders"}
 
 @app.get('/')
 async def read_root():
@@ -0,0 +1,116 @@
+"""Re-publish dead-lettered orders from the subscriber's dead-letter file.
+
+Reads the file line by line and publishes the events in bulk batches, paced so
+no more than --rate events are published per second, which keeps a replay from
+swamping the subscriber that failed them in the first place. Each event goes
+back to the topic it was dead-lettered from, as stored with it, or to --topic
+when given.
+
+Only records holding JSON data are published. A record without data, or
+with data the subscriber stored as text because it was not JSON, would only
+fail and be dead-lettered again; it is skipped and its line is reported. On a
+failed batch the replay stops and prints the line to resume from with
+--skip. Connects to the sidecar the same way the publisher app does, through
+the DAPR_* environment variables.
+
+    uv run python publisher/replay.py subscriber/deadletter.ndjson --rate 100 --batch-size 20
+"""
+
+from itertools import islice
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from dapr.aio.clients import DaprClient
+import grpc
+
+logging.basicConfig(level=logging.INFO)
+
+# Where records stored without a topic go.
+default_topic = os.getenv('TOPIC_NAME', 'orders')
+
+
+def replayable(record):
+    return record.get('contentType') == 'application/json' and record.get('data') is not None
+
+
+def read_batches(path, skip, batch_size):
+    """Yield (first_line, records) batches of replayable records from the
+    dead-letter file, logging the lines of the records that are skipped."""
+    with open(path, 'rb') as lines:
+        numbered = ((number, line) for number, line in enumerate(islice(lines, skip, None), start=skip)
+                    if line.strip())
+        while batch := list(islice(numbered, batch_size)):
+            records = []
+            for number, line in batch:
+                record = json.loads(line)
+                if replayable(record):
+                    records.append(record)
+                else:
+                    logging.warning('Skipping line %s: event %s has no JSON data to replay', number, record.get('id'))
+            if records:
+                yield batch[0][0], records
+
+
+def positive(type_):
+    def parse(value):
+        number = type_(value)
+        if number <= 0:
+            raise argparse.ArgumentTypeError(f'must be greater than 0, not {value}')
+        return number
+    return parse
+
+
+async def replay(args):
+    client = DaprClient()
+    replayed = 0
+    started = time.monotonic()
+    try:
+        for first_line, records in read_batches(args.file, args.skip, args.batch_size):
+            topics = {}
+            for record in records:
+                topics.setdefault(args.topic or record.get('topic') or default_topic, []).append(record)
+            failed = 0
+            for topic, group in topics.items():
+                try:
+                    response = await client.publish_events(
+                        pubsub_name=args.pubsub, topic_name=topic,
+                        data=[json.dumps(record['data'], separators=(',', ':')) for record in group],
+                        data_content_type='application/json')
+                    failed += len(response.failed_entries)
+                except grpc.RpcError as err:
+                    logging.error('Error occurred while replaying lines from %s to %s: %s', first_line, topic, err.code())
+                    failed += len(group)
+            if failed:
+                logging.error('Replay stopped; resume with --skip %s', first_line)
+                return 1
+            replayed += len(records)
+            # Hold the pace: the next batch may start once the events so far
+            # fit within --rate per second.
+            delay = replayed / args.rate - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        logging.info('Replay finished. %s event(s) re-published', replayed)
+        return 0
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', help='dead-letter file written by the subscriber')
+    parser.add_argument('--rate', type=positive(float), default=100, help='most events re-published per second')
+    parser.add_argument('--batch-size', type=positive(int), default=20, help='events per bulk publish')
+    parser.add_argument('--skip', type=int, default=0, help='lines of the file to skip')
+    parser.add_argument('--pubsub', default=os.getenv('PUBSUB_NAME', 'pubsub'))
+    parser.add_argument('--topic', help='publish every event to this topic instead of the one stored with it')
+    args = parser.parse_args()
+    sys.exit(asyncio.run(replay(args)))
+
+
+if __name__ == '__main__':
+    main()
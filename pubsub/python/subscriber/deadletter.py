@@ -0,0 +1,43 @@
+import threading
+import time
+import orjson
+
+
+class DeadLetterLog:
+    """Appends dead-lettered events to a file, one compact JSON line each.
+
+    Only what a replay needs is kept: the event id, the topic it failed on,
+    its content type, its decoded data and when it was dead-lettered. Envelope
+    fields such as trace ids are dropped, as a replay publishes a new event
+    anyway.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.written = 0
+
+    def open(self):
+        self._file = open(self.path, 'ab')
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def append(self, event_id, topic, content_type, data):
+        record = {
+            "id": event_id,
+            "topic": topic,
+            "contentType": content_type,
+            "data": data,
+            "deadAt": round(time.time(), 3),
+        }
+        line = orjson.dumps(record) + b'\n'
+        with self._lock:
+            self._file.write(line)
+            # Flushed per event: a dead letter is acknowledged once written,
+            # so it must not sit in a buffer when the process dies.
+            self._file.flush()
+            self.written += 1
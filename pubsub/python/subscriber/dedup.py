@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from dapr.clients.grpc._state import Concurrency, Consistency, StateOptions
+import logging
+import threading
+import time
+import grpc
+
+# A claim is a first-write: it succeeds only for the replica that writes the
+# key first, and strong consistency makes every replica see that write.
+FIRST_WRITE = StateOptions(consistency=Consistency.strong, concurrency=Concurrency.first_write)
+
+
+class DedupIndex:
+    """Remembers the ids of recently processed messages, so a redelivered
+    message is acknowledged without being processed again.
+
+    The index is an LRU bounded by size and by ttl seconds per id, so it only
+    catches redeliveries within that window. Once client is set to a
+    DaprClient, each id is also claimed in the state store store_name, with
+    the same TTL, so that replicas sharing the store skip messages another
+    replica has processed. A size of 0 disables deduplication.
+    """
+
+    def __init__(self, size=10000, ttl=600.0, store_name=None, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self.client = None
+        self.store_name = store_name
+        self._clock = clock
+        self._ids = OrderedDict()  # id -> seen_at
+        self._lock = threading.Lock()
+        self.counters = {"processed": 0, "duplicates": 0, "storeDuplicates": 0, "released": 0, "evictions": 0}
+
+    @property
+    def store_backed(self):
+        return self.client is not None
+
+    def claim(self, message_id):
+        """Return True if the message is new and should be processed, False if
+        it is a duplicate. A message without an id is always processed."""
+        if not self.size or not message_id:
+            return True
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            if message_id in self._ids:
+                self.counters["duplicates"] += 1
+                return False
+            self._ids[message_id] = now
+            while len(self._ids) > self.size:
+                self._ids.popitem(last=False)
+                self.counters["evictions"] += 1
+        if self.store_backed and not self._claim_in_store(message_id):
+            with self._lock:
+                self.counters["storeDuplicates"] += 1
+            return False
+        with self._lock:
+            self.counters["processed"] += 1
+        return True
+
+    def release(self, message_id):
+        """Forget a claimed message whose processing failed, so its redelivery
+        is processed rather than skipped."""
+        if not self.size or not message_id:
+            return
+        with self._lock:
+            self._ids.pop(message_id, None)
+            self.counters["released"] += 1
+        if self.store_backed:
+            try:
+                self.client.delete_state(self.store_name, self._key(message_id))
+            except grpc.RpcError as err:
+                logging.error('Error occurred while releasing message %s. Exception= %s', message_id, err.details())
+
+    def _expire(self, now):
+        while self._ids:
+            message_id, seen_at = next(iter(self._ids.items()))
+            if now - seen_at < self.ttl:
+                return
+            del self._ids[message_id]
+            self.counters["evictions"] += 1
+
+    def _key(self, message_id):
+        return f'dedup-{message_id}'
+
+    def _claim_in_store(self, message_id):
+        try:
+            self.client.save_state(store_name=self.store_name, key=self._key(message_id), value='1',
+                                   options=FIRST_WRITE, state_metadata={'ttlInSeconds': str(int(self.ttl))})
+            return True
+        except grpc.RpcError as err:
+            if err.code() == grpc.StatusCode.ABORTED:
+                return False
+            # Without the store the local index is all there is; processing a
+            # possible duplicate beats dropping a message.
+            logging.error('Error occurred while claiming message %s. Exception= %s', message_id, err.details())
+            return True
+
+    def stats(self):
+        with self._lock:
+            duplicates = self.counters["duplicates"] + self.counters["storeDuplicates"]
+            received = self.counters["processed"] + duplicates
+            return {
+                **self.counters,
+                "entries": len(self._ids),
+                "size": self.size,
+                "ttl": self.ttl,
+                "storeBacked": self.store_backed,
+                "hitRate": duplicates / received if received else 0.0,
+            }
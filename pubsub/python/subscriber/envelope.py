@@ -0,0 +1,55 @@
+import base64
+import orjson
+
+
+class LazyEnvelope:
+    """A delivered message, decoded only as far as it is read.
+
+    The body is either a CloudEvent, or the bare published payload when it was
+    published as a raw payload. Nothing is parsed until a field is read, no
+    envelope field is validated, and a base64 data field is only decoded when
+    data is read. Reading data from a bare payload returns the payload itself.
+    """
+
+    __slots__ = ('_body', '_document', '_data')
+
+    def __init__(self, body):
+        self._body = body
+        self._document = None
+        self._data = None
+
+    @property
+    def document(self):
+        if self._document is None:
+            self._document = orjson.loads(self._body)
+        return self._document
+
+    @property
+    def is_cloud_event(self):
+        return isinstance(self.document, dict) and 'specversion' in self.document
+
+    def get(self, name, default=None):
+        """An envelope field such as id or topic; None for a bare payload."""
+        return self.document.get(name, default) if self.is_cloud_event else default
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._decode_data()
+        return self._data
+
+    def _decode_data(self):
+        if not self.is_cloud_event:
+            return self.document
+        document = self.document
+        if 'data_base64' in document:
+            # A raw payload wrapped by the sidecar: JSON if it parses, bytes if not.
+            raw = base64.b64decode(document['data_base64'])
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                return raw
+        data = document.get('data')
+        if isinstance(data, str) and 'json' in document.get('datacontenttype', ''):
+            return orjson.loads(data)
+        return data
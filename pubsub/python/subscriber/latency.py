@@ -0,0 +1,85 @@
+import threading
+
+
+class LatencyHistogram:
+    """An HDR-style histogram of latencies in microseconds.
+
+    Values below 2**sub_bucket_bits are counted exactly. Above that, each
+    power-of-two range is split into 2**(sub_bucket_bits - 1) equal buckets, so
+    every recorded value is off by at most 1 / 2**(sub_bucket_bits - 1) of
+    itself (under 1.6% with the default 7 bits), whatever its magnitude, and
+    memory grows with the number of distinct buckets hit, not with the count.
+    """
+
+    def __init__(self, sub_bucket_bits=7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_buckets = 1 << sub_bucket_bits
+        self._half = self._sub_buckets >> 1
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}  # bucket index -> count
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = None
+
+    def _index(self, value):
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self._sub_buckets + (shift - 1) * self._half + ((value >> shift) - self._half)
+
+    def _bounds(self, index):
+        """The lowest and highest value counted in a bucket."""
+        if index < self._sub_buckets:
+            return index, index
+        shift, offset = divmod(index - self._sub_buckets, self._half)
+        shift += 1
+        low = (self._half + offset) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value):
+        value = max(0, int(value))
+        index = self._index(value)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percentile):
+        """The value at or below which percentile% of the recorded values fall,
+        reported as the top of its bucket."""
+        with self._lock:
+            if not self.count:
+                return 0
+            rank = max(1, round(self.count * percentile / 100))
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= rank:
+                    return min(self._bounds(index)[1], self.max)
+            return self.max
+
+    def summary(self):
+        return {
+            "unit": "us",
+            "count": self.count,
+            "min": self.min or 0,
+            "mean": self.total / self.count if self.count else 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p99.9": self.percentile(99.9),
+            "max": self.max or 0,
+        }
+
+    def dump(self):
+        """The summary plus every non-empty bucket as [low, high, count]."""
+        with self._lock:
+            buckets = [[*self._bounds(index), self._counts[index]] for index in sorted(self._counts)]
+        return {**self.summary(), "subBucketBits": self.sub_bucket_bits, "buckets": buckets}
@@ -1,13 +1,81 @@
 from dapr.clients import DaprClient
 from pydantic import BaseModel
 from cloudevents.sdk.event import v1
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from deadletter import DeadLetterLog
+from dedup import DedupIndex
+from envelope import LazyEnvelope
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+from latency import LatencyHistogram
+from workers import QueueFull, WorkerPool
+import asyncio
 import logging
-
-app = FastAPI()
+import orjson
+import os
+import time
 
 logging.basicConfig(level=logging.INFO)
 
+dedup_index_size = int(os.getenv('DEDUP_INDEX_SIZE', '10000'))
+dedup_ttl = float(os.getenv('DEDUP_TTL', '600'))
+dedup_statestore = os.getenv('DEDUP_STATESTORE')
+worker_pool_size = int(os.getenv('WORKER_POOL_SIZE', '8'))
+work_queue_size = int(os.getenv('WORK_QUEUE_SIZE', '1000'))
+# Process orders with the same partition key in arrival order, one at a time,
+# and orders with different keys in parallel. The key is read from the same
+# order field the publisher partitions on, falling back to the orderId.
+ordered_processing = os.getenv('ORDERED_PROCESSING', 'false').lower() == 'true'
+partition_key_field = os.getenv('PARTITION_KEY_FIELD', '')
+# Simulated work per order, for trying out the worker pool under load.
+order_processing_ms = float(os.getenv('ORDER_PROCESSING_MS', '0'))
+dead_letter_file = os.getenv('DEAD_LETTER_FILE', 'deadletter.ndjson')
+# Record publish-to-receive latency of orders stamped by a publisher with the
+# same setting; off, deliveries skip it entirely.
+latency_tracing = os.getenv('TRACE_LATENCY', 'false').lower() == 'true'
+# The sidecar delivers a dead letter as an event on the dead-letter topic.
+# Events on it are recorded as having failed on the orders topic, the one
+# whose subscriptions dead-letter to it, unless they say otherwise.
+dead_letter_topic = os.getenv('DEAD_LETTER_TOPIC', 'orders-deadletter')
+topic_name = os.getenv('TOPIC_NAME', 'orders')
+
+# Ids of recently processed messages, so redeliveries are acknowledged without
+# being processed twice. With DEDUP_STATESTORE set, ids are also claimed in
+# that state store, which deduplicates across replicas.
+dedup = DedupIndex(size=dedup_index_size, ttl=dedup_ttl, store_name=dedup_statestore)
+
+async def process_order(order_id):
+    if order_processing_ms:
+        await asyncio.sleep(order_processing_ms / 1000)
+    logging.info('Order received: %s', order_id)
+
+# Orders are processed by a fixed set of workers off a bounded queue, not
+# inline in the request handler.
+workers = WorkerPool(process_order, workers=worker_pool_size, queue_size=work_queue_size,
+                     ordered=ordered_processing)
+
+# Publish-to-receive latency of orders the publisher stamped with sentAtNs
+# (TRACE_LATENCY=true on both apps).
+receive_latency = LatencyHistogram()
+
+# Events that exhausted their retries, kept for inspection and for replay with
+# publisher/replay.py.
+dead_letters = DeadLetterLog(dead_letter_file)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if dedup_statestore:
+        dedup.client = await asyncio.to_thread(DaprClient)
+    dead_letters.open()
+    workers.start()
+    yield
+    await workers.stop()
+    dead_letters.close()
+    if dedup.client:
+        dedup.client.close()
+
+app = FastAPI(lifespan=lifespan)
+
 class Order(BaseModel):
     orderId: int
 
@@ -23,16 +91,217 @@ class CloudEvent(BaseModel):
     type: str
     traceid: str
 
+class BulkEntry(BaseModel):
+    entryId: str
+    event: dict
+    contentType: str = 'application/cloudevents+json'
+    metadata: dict = {}
+
+class BulkMessage(BaseModel):
+    entries: list[BulkEntry]
+    id: str = ''
+    pubsubname: str = ''
+    topic: str = ''
+    type: str = ''
+    metadata: dict = {}
+
+def message_id_of(value):
+    """A message id from a payload, as a string: it keys the dedup index, and
+    an id that is not a string, such as a list, would not be hashable."""
+    return None if value is None else str(value)
+
+def order_id_of(data):
+    return data.get('orderId') or data.get('key')
+
+def trace_latency(data):
+    sent_at = data.get('sentAtNs')
+    # The stamp comes from the payload; anything but an integer is ignored.
+    if isinstance(sent_at, int) and not isinstance(sent_at, bool):
+        receive_latency.record((time.time_ns() - sent_at) // 1000)
+    elif sent_at is not None:
+        logging.debug('Ignoring sentAtNs that is not an integer: %r', sent_at)
+
+def partition_key_of(data, order_id):
+    """The key an order is queued by, or None when ordered processing is on
+    and the key is not a string or number, so it can never be routed."""
+    key = data.get(partition_key_field)
+    key = order_id if key is None else key
+    if ordered_processing and not isinstance(key, (str, int)):
+        logging.error('Partition key of order %s is not a string or number: %r', order_id, key)
+        return None
+    return key
+
+async def claim(message_id):
+    # A store-backed claim is a blocking sidecar call; keep it off the event loop.
+    if dedup.store_backed:
+        return await asyncio.to_thread(dedup.claim, message_id)
+    return dedup.claim(message_id)
+
+async def release(message_id):
+    if dedup.store_backed:
+        await asyncio.to_thread(dedup.release, message_id)
+    else:
+        dedup.release(message_id)
+
+async def deliver(order_id, message_id, key=None):
+    """Deduplicate, queue and process one order. Returns SUCCESS, DUPLICATE,
+    or RETRY when the queue is full or processing failed."""
+    if not await claim(message_id):
+        logging.info('Duplicate message %s for order %s ignored', message_id, order_id)
+        return 'DUPLICATE'
+    try:
+        await workers.run(order_id, key)
+        return 'SUCCESS'
+    except QueueFull:
+        logging.warning('Work queue full, order %s will be redelivered', order_id)
+    except Exception:
+        logging.exception('Error occurred while processing order %s', order_id)
+    await release(message_id)
+    return 'RETRY'
+
+async def set_aside(event_id, topic, data):
+    """Append a message that can never be processed to the dead-letter file
+    and return DROP, or RETRY if it could not be stored. The sidecar discards
+    a dropped message rather than sending it to the dead-letter topic."""
+    content_type = 'text/plain' if isinstance(data, str) else 'application/json'
+    try:
+        await asyncio.to_thread(dead_letters.append, event_id, topic or topic_name, content_type, data)
+    except OSError as err:
+        logging.error('Error occurred while storing dead letter %s. Exception= %s', event_id, err)
+        return 'RETRY'
+    logging.warning('Dead letter stored: %s', event_id)
+    return 'DROP'
+
+def delivery_response(status, order_id):
+    if status == 'RETRY':
+        # A 200 with a RETRY status tells the sidecar to redeliver the message.
+        return {"status": "RETRY"}
+    if status == 'DUPLICATE':
+        return {"message": "Duplicate message ignored", "orderId": order_id}
+    return {"message": "Message received successfully", "orderId": order_id}
+
 @app.post('/neworder')
-def consume_orders(event: CloudEvent):
-    order_id = event.data.get('orderId') or event.data.get('key')
+async def consume_orders(event: CloudEvent):
+    if latency_tracing:
+        trace_latency(event.data)
+    order_id = order_id_of(event.data)
     if order_id:
-        logging.info('Order received: %s' % order_id)
-        return {"message": "Message received successfully", "orderId": order_id}
+        key = partition_key_of(event.data, order_id)
+        if key is None:
+            return {"status": await set_aside(event.id, event.topic, event.data)}
+        return delivery_response(await deliver(order_id, event.id, key), order_id)
     else:
         logging.error('Missing key in event data: orderId or key')
         raise HTTPException(status_code=400, detail={"error": {"code": "MISSING_ORDER_ID", "message": "Missing key in event data: orderId or key"}})
 
+@app.post('/neworder/raw')
+async def consume_orders_raw(request: Request):
+    """The same as /neworder, for subscriptions delivering raw payloads.
+
+    The body is read as a LazyEnvelope instead of being validated against the
+    CloudEvent model, so a message costs one JSON parse and the lookup of the
+    order id, and a bare payload is accepted as well as a CloudEvent.
+    """
+    try:
+        envelope = LazyEnvelope(await request.body())
+        data = envelope.data
+    except (orjson.JSONDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail={"error": {"code": "INVALID_MESSAGE", "message": "Message body is not valid JSON"}})
+    order_id = order_id_of(data) if isinstance(data, dict) else None
+    if order_id:
+        if latency_tracing:
+            trace_latency(data)
+        message_id = message_id_of(envelope.get('id'))
+        key = partition_key_of(data, order_id)
+        if key is None:
+            return {"status": await set_aside(message_id, envelope.get('topic'), data)}
+        # A bare payload has no id, so it cannot be deduplicated.
+        status = await deliver(order_id, message_id, key)
+        return delivery_response(status, order_id)
+    logging.error('Missing key in event data: orderId or key')
+    raise HTTPException(status_code=400, detail={"error": {"code": "MISSING_ORDER_ID", "message": "Missing key in event data: orderId or key"}})
+
+async def consume_entry(entry, topic):
+    """Process one entry of a bulk message and return its delivery status:
+    SUCCESS, DROP for an order that can never be processed, once it has been
+    stored in the dead-letter file, or RETRY to have the sidecar deliver it
+    again."""
+    # Entries arrive as CloudEvents unless the subscription uses raw payloads.
+    is_cloud_event = 'cloudevents' in entry.contentType
+    data = entry.event.get('data', entry.event) if is_cloud_event else entry.event
+    order_id = order_id_of(data) if isinstance(data, dict) else None
+    message_id = message_id_of(entry.event.get('id')) if is_cloud_event else None
+    if not order_id:
+        logging.error('Missing key in event data: orderId or key (entry %s)', entry.entryId)
+    key = partition_key_of(data, order_id) if order_id else None
+    if key is None:
+        return await set_aside(message_id, entry.event.get('topic', topic) if is_cloud_event else topic, data)
+    if latency_tracing:
+        trace_latency(data)
+    status = await deliver(order_id, message_id, key)
+    return 'SUCCESS' if status == 'DUPLICATE' else status
+
+@app.post('/neworder/bulk')
+async def consume_orders_bulk(message: BulkMessage):
+    """Receive a batch of orders from a bulk subscription in one request.
+
+    Entries are processed concurrently and each gets its own status, so one bad
+    order is set aside or retried without redelivering the rest of the batch.
+    """
+    statuses = await asyncio.gather(*(consume_entry(entry, message.topic) for entry in message.entries))
+    logging.info('Bulk message received with %s order(s)', len(message.entries))
+    return {"statuses": [{"entryId": entry.entryId, "status": status} for entry, status in zip(message.entries, statuses)]}
+
+@app.post('/deadletter')
+async def consume_dead_letters(request: Request):
+    """Receive events from the dead-letter topic and append them to the
+    dead-letter file, so a poison message is set aside instead of being
+    retried for ever."""
+    body = await request.body()
+    envelope = LazyEnvelope(body)
+    try:
+        event_id, topic, data = envelope.get('id'), envelope.get('topic'), envelope.data
+    except (orjson.JSONDecodeError, ValueError):
+        event_id, topic, data = None, None, None
+    if topic in (None, dead_letter_topic):
+        topic = topic_name
+    if data is None or isinstance(data, bytes):
+        # Not JSON, or a CloudEvent without JSON data: keep the body as it
+        # arrived, so nothing is lost, though it cannot be replayed as an order.
+        content_type, data = 'text/plain', body.decode('utf-8', errors='replace')
+    else:
+        content_type = 'text/plain' if isinstance(data, str) else 'application/json'
+    try:
+        await asyncio.to_thread(dead_letters.append, event_id, topic, content_type, data)
+    except OSError as err:
+        logging.error('Error occurred while storing dead letter %s. Exception= %s', event_id, err)
+        return {"status": "RETRY"}
+    logging.warning('Dead letter stored: %s', event_id)
+    return {"status": "SUCCESS"}
+
+@app.get('/latency')
+async def read_latency():
+    """Percentiles of the publish-to-receive latency, in microseconds."""
+    return receive_latency.summary()
+
+@app.get('/latency/dump')
+async def dump_latency():
+    """The full latency histogram, for saving and comparing between runs."""
+    return receive_latency.dump()
+
+@app.delete('/latency')
+async def reset_latency():
+    receive_latency.reset()
+    return Response(status_code=204)
+
+@app.get('/dedup')
+async def read_dedup_stats():
+    return dedup.stats()
+
+@app.get('/workers')
+async def read_worker_stats():
+    return workers.stats()
+
 @app.get('/')
 async def read_root():
     health_message = "Health check passed. Everything is running smoothly!"
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+
+
+class QueueFull(Exception):
+    """The work queue has no room. The message should be redelivered later."""
+
+
+class WorkerPool:
+    """A bounded queue of orders worked off by a fixed number of async workers.
+
+    run() queues an order and waits until a worker has processed it, so the
+    delivery is only acknowledged once the work is done. When the queue is
+    full, run() fails at once with QueueFull instead of waiting: the handler
+    answers RETRY, and the sidecar backs off and redelivers, rather than
+    requests piling up until they time out and are all redelivered together.
+
+    With ordered set, every worker has a queue of its own and run() picks the
+    queue by key, so orders with the same key are processed one at a time in
+    the order they arrived, while orders with different keys are processed in
+    parallel. queue_size is then split between the workers.
+    """
+
+    def __init__(self, process, workers=8, queue_size=1000, ordered=False):
+        self._process = process
+        self.workers = max(1, workers)
+        self.ordered = ordered
+        if ordered:
+            self._queues = [asyncio.Queue(maxsize=max(1, queue_size // self.workers)) for _ in range(self.workers)]
+        else:
+            self._queues = [asyncio.Queue(maxsize=max(1, queue_size))]
+        self._tasks = []
+        self.counters = {"processed": 0, "failed": 0, "rejected": 0}
+        self.busy = 0
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work(self._queues[n % len(self._queues)]))
+                       for n in range(self.workers)]
+
+    async def stop(self):
+        """Finish the queued orders, then stop the workers."""
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def run(self, item, key=None):
+        queue = self._queues[hash(key) % len(self._queues)] if self.ordered else self._queues[0]
+        future = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise QueueFull()
+        return await future
+
+    async def _work(self, queue):
+        while True:
+            item, future = await queue.get()
+            self.busy += 1
+            try:
+                result = await self._process(item)
+                self.counters["processed"] += 1
+                if not future.done():
+                    future.set_result(result)
+            except Exception as err:
+                self.counters["failed"] += 1
+                if not future.done():
+                    future.set_exception(err)
+                else:
+                    logging.exception('Error occurred while processing %s', item)
+            finally:
+                self.busy -= 1
+                queue.task_done()
+
+    def stats(self):
+        return {
+            **self.counters,
+            "queued": sum(queue.qsize() for queue in self._queues),
+            "capacity": sum(queue.maxsize for queue in self._queues),
+            "workers": self.workers,
+            "ordered": self.ordered,
+            "busy": self.busy,
+        }
@@ -0,0 +1,110 @@
+"""Compare the sync app (main.py) against the async app (main_aio.py) under load.
+
+Starts a local sidecar stand-in, launches each app under uvicorn against it, and
+drives GET /order/{id} from 50, 500 and 5000 concurrent clients, printing
+throughput and p50/p99 latency for each. No Catalyst project is needed.
+
+    uv run python benchmarks/bench_async.py --duration 10
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+from sidecar import LocalSidecar
+
+APP_DIR = Path(__file__).resolve().parent.parent
+PORT = 5011
+
+
+async def wait_until_healthy(session, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f'{url} did not become healthy')
+
+
+async def drive(session, base_url, clients, duration):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client(n):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                async with session.get(f'{base_url}/order/{n % 100}') as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.monotonic()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    return sorted(latencies), errors, time.monotonic() - start
+
+
+async def bench_app(module, sidecar, levels, duration):
+    # The sync app's read cache is off, so both apps go to the sidecar for
+    # every GET, and the apps' own INFO lines are off along with uvicorn's.
+    env = {**os.environ, **sidecar.environ(), 'ORDER_CACHE_SIZE': '0', 'LOG_LEVEL': 'WARNING'}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', f'{module}:app', '--port', str(PORT), '--log-level', 'warning'],
+        cwd=APP_DIR, env=env)
+    base_url = f'http://127.0.0.1:{PORT}'
+    try:
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_until_healthy(session, f'{base_url}/')
+            for order_id in range(100):
+                await session.post(f'{base_url}/order', json={'orderId': order_id})
+            for clients in levels:
+                latencies, errors, elapsed = await drive(session, base_url, clients, duration)
+                if not latencies:
+                    print(f'{module:<9} {clients:>5} clients   all {errors} requests failed')
+                    continue
+                p50 = statistics.median(latencies) * 1000
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+                print(f'{module:<9} {clients:>5} clients {len(latencies) / elapsed:>8.0f} req/s   '
+                      f'p50 {p50:>8.2f} ms   p99 {p99:>8.2f} ms   errors {errors}')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    parser.add_argument('--clients', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--latency-ms', type=float, default=5,
+                        help='simulated sidecar latency per call')
+    args = parser.parse_args()
+
+    # Enough sidecar threads that the stand-in is never the bottleneck.
+    sidecar = LocalSidecar(latency_ms=args.latency_ms, workers=1024)
+    sidecar.start()
+    try:
+        for module in ('main', 'main_aio'):
+            asyncio.run(bench_app(module, sidecar, args.clients, args.duration))
+    finally:
+        sidecar.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Compare a DaprClient per request against the shared client pool.
+
+Runs the same save/get/delete sequence the order app performs, from a number of
+concurrent workers, against a local sidecar stand-in, and prints p50/p99
+latency and throughput for each pattern. No Catalyst project is needed.
+
+    uv run python benchmarks/bench_client_pool.py --requests 2000 --concurrency 16
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import time
+
+# The benchmark imports the app's own modules from the parent directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from client_pool import DaprClientPool
+from dapr.clients import DaprClient
+from sidecar import LocalSidecar
+
+STORE = 'statestore'
+
+
+def order_roundtrip(d, order_id):
+    key = str(order_id)
+    d.save_state(store_name=STORE, key=key, value=f'orderId={order_id}')
+    d.get_state(STORE, key)
+    d.delete_state(STORE, key)
+
+
+def per_request(order_id):
+    with DaprClient() as d:
+        order_roundtrip(d, order_id)
+
+
+def make_pooled(pool):
+    def pooled(order_id):
+        with pool.client() as d:
+            order_roundtrip(d, order_id)
+    return pooled
+
+
+def run(name, call, requests, concurrency):
+    def timed(order_id):
+        start = time.perf_counter()
+        call(order_id)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'{name:<12} {requests / elapsed:>10.0f} req/s   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--pool-size', type=int, default=2)
+    parser.add_argument('--latency-ms', type=float, default=0.5,
+                        help='simulated sidecar latency per call')
+    args = parser.parse_args()
+
+    sidecar = LocalSidecar(latency_ms=args.latency_ms)
+    sidecar.start()
+    pool = DaprClientPool(size=args.pool_size)
+    pool.open()
+    try:
+        run('per-request', per_request, args.requests, args.concurrency)
+        run('pooled', make_pooled(pool), args.requests, args.concurrency)
+    finally:
+        pool.close()
+        sidecar.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Measure encode/decode throughput and stored size for each state codec.
+
+`repr` is the format the application used to store, `str(order)`, built from
+the same dict the other codecs serialise and decoded the way the application
+still reads it: by parsing the `field=value` text back into an Order.
+
+    uv run python benchmarks/bench_codecs.py --iterations 200000
+"""
+
+from pathlib import Path
+import argparse
+import sys
+import time
+
+# The benchmark imports the app's own modules from the parent directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from codec import CODECS, LegacyTextCodec
+from pydantic import BaseModel
+
+
+class Order(BaseModel):
+    orderId: int
+
+
+class ReprCodec(LegacyTextCodec):
+    name = 'repr'
+
+    def encode(self, value):
+        # What str(order) produces, without validating the dict as a model
+        # first, so only serialisation is measured as for the other codecs.
+        return f"orderId={value['orderId']}".encode()
+
+
+def measure(codec, order, iterations):
+    value = order.model_dump()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        data = codec.encode(value)
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        Order.model_validate(codec.decode(data))
+    decode_s = time.perf_counter() - start
+
+    print(f'{codec.name:<8} encode {iterations / encode_s:>12,.0f} ops/s   '
+          f'decode {iterations / decode_s:>12,.0f} ops/s   {len(data):>3} bytes')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    order = Order(orderId=123456)
+    for codec in (ReprCodec(), *CODECS.values()):
+        measure(codec, order, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Compare saving and publishing an order in two calls against one outbox call.
+
+Concurrent writers each save a run of orders and publish an event for each one,
+in one of two ways:
+
+- two-call: save_state to the state store, then publish_event to the topic.
+  Two round-trips, and a crash or failed publish between them leaves a saved
+  order with no event.
+- outbox: one execute_state_transaction on an outbox store, which the sidecar
+  commits and publishes together, as POST /order/outbox does.
+
+Prints orders/s and p50/p99 latency per order. The stand-in sidecar does not
+simulate the broker, so the difference shown is the round-trip saved by the
+app; a real sidecar does more work of its own for an outbox transaction.
+
+    uv run python benchmarks/bench_outbox.py --writers 32 --latency-ms 1
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import time
+
+# The benchmark imports the app's own modules from the parent directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from client_pool import DaprClientPool
+from dapr.clients.grpc._request import TransactionalStateOperation
+from model import Order, encode_order
+from sidecar import LocalSidecar
+
+
+def two_call(d, order):
+    d.save_state(store_name='statestore', key=str(order.orderId), value=encode_order(order))
+    d.publish_event(pubsub_name='pubsub', topic_name='orders', data=encode_order(order),
+                    data_content_type='application/json')
+
+
+def outbox(d, order):
+    d.execute_state_transaction(store_name='outboxstore', operations=[
+        TransactionalStateOperation(key=str(order.orderId), data=encode_order(order))])
+
+
+def run(name, strategy, pool, sidecar, args):
+    published_before = len(sidecar.servicer.published)
+
+    def writer(n):
+        latencies = []
+        with pool.client() as d:
+            for i in range(args.orders):
+                start = time.perf_counter()
+                strategy(d, Order(orderId=n * args.orders + i))
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.writers) as executor:
+        latencies = sorted(latency for batch in executor.map(writer, range(args.writers)) for latency in batch)
+    elapsed = time.perf_counter() - start
+
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    published = len(sidecar.servicer.published) - published_before
+    print(f'{name:<9} {len(latencies) / elapsed:>8.0f} orders/s   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms   '
+          f'events {published}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=32)
+    parser.add_argument('--orders', type=int, default=200, help='orders per writer')
+    parser.add_argument('--latency-ms', type=float, default=1,
+                        help='simulated sidecar latency per call')
+    args = parser.parse_args()
+
+    sidecar = LocalSidecar(latency_ms=args.latency_ms, workers=max(32, args.writers))
+    sidecar.start()
+    pool = DaprClientPool(size=2)
+    pool.open()
+    try:
+        run('two-call', two_call, pool, sidecar, args)
+        run('outbox', outbox, pool, sidecar, args)
+    finally:
+        pool.close()
+        sidecar.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""A local stand-in for the Dapr sidecar, for benchmarks only.
+
+Serves the gRPC state APIs the order app calls from an in-memory dict, plus the
+HTTP health endpoint every DaprClient polls before it dials its channel. An
+optional per-call latency approximates the network hop to a real sidecar.
+Published events, whether sent with PublishEvent or by a transaction on an
+outbox store, are recorded in order in servicer.published.
+
+    sidecar = LocalSidecar(latency_ms=1)
+    sidecar.start()   # points dapr.conf.settings at it
+    ...
+    sidecar.stop()
+"""
+
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+import grpc
+from dapr.conf import settings
+from dapr.proto import api_service_v1, api_v1, common_v1
+from google.protobuf import empty_pb2
+
+
+class InMemoryDapr(api_service_v1.DaprServicer):
+    def __init__(self, latency_ms=0.0, outbox_stores=('outboxstore',)):
+        self.latency_s = latency_ms / 1000
+        self.outbox_stores = set(outbox_stores)
+        self.published = []  # (topic, data)
+        self.lock = threading.Lock()
+        # key -> (value, etag). Etags come from one store-wide version counter.
+        self.items = {}
+        self.versions = 0
+
+    def _hop(self):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def _next_etag(self):
+        self.versions += 1
+        return str(self.versions)
+
+    def GetMetadata(self, request, context):
+        return api_v1.GetMetadataResponse(id='order-app')
+
+    def _conflicts(self, item):
+        """First-write-wins as Dapr applies it: a supplied ETag must match the
+        stored one, and a first-write without one requires the key be absent."""
+        current = self.items.get(item.key)
+        if item.HasField('etag'):
+            return current is None or current[1] != item.etag.value
+        first_write = item.options.concurrency == common_v1.StateOptions.CONCURRENCY_FIRST_WRITE
+        return first_write and current is not None
+
+    def SaveState(self, request, context):
+        self._hop()
+        with self.lock:
+            if any(self._conflicts(item) for item in request.states):
+                context.abort(grpc.StatusCode.ABORTED, 'possible etag mismatch')
+            for item in request.states:
+                self.items[item.key] = (item.value, self._next_etag())
+        return empty_pb2.Empty()
+
+    def GetState(self, request, context):
+        self._hop()
+        with self.lock:
+            value, etag = self.items.get(request.key, (b'', ''))
+        return api_v1.GetStateResponse(data=value, etag=etag)
+
+    def GetBulkState(self, request, context):
+        self._hop()
+        with self.lock:
+            found = [(key, self.items.get(key, (b'', ''))) for key in request.keys]
+        return api_v1.GetBulkStateResponse(items=[
+            api_v1.BulkStateItem(key=key, data=value, etag=etag) for key, (value, etag) in found])
+
+    def ExecuteStateTransaction(self, request, context):
+        self._hop()
+        with self.lock:
+            if any(self._conflicts(operation.request) for operation in request.operations):
+                context.abort(grpc.StatusCode.ABORTED, 'possible etag mismatch')
+            for operation in request.operations:
+                if operation.operationType == 'delete':
+                    self.items.pop(operation.request.key, None)
+                else:
+                    self.items[operation.request.key] = (operation.request.value, self._next_etag())
+                    if request.storeName in self.outbox_stores:
+                        self.published.append(('orders', operation.request.value))
+        return empty_pb2.Empty()
+
+    def PublishEvent(self, request, context):
+        self._hop()
+        with self.lock:
+            self.published.append((request.topic, request.data))
+        return empty_pb2.Empty()
+
+    def QueryStateAlpha1(self, request, context):
+        """EQ, IN, AND and OR filters over top-level JSON fields, sorting, and
+        paging with the offset as the token. Enough for the order queries."""
+        self._hop()
+        query = json.loads(request.query)
+        with self.lock:
+            rows = [(key, value, etag, json.loads(value)) for key, (value, etag) in self.items.items()]
+        rows = [row for row in rows if _matches(query.get('filter'), row[3])]
+        for sort in reversed(query.get('sort', [])):
+            rows.sort(key=lambda row: row[3].get(sort['key']), reverse=sort.get('order') == 'DESC')
+        page = query.get('page', {})
+        start = int(page.get('token') or 0)
+        end = start + page['limit'] if page.get('limit') else len(rows)
+        return api_v1.QueryStateResponse(
+            results=[api_v1.QueryStateItem(key=key, data=value, etag=etag) for key, value, etag, _ in rows[start:end]],
+            token=str(end) if end < len(rows) else '')
+
+    def DeleteState(self, request, context):
+        self._hop()
+        with self.lock:
+            self.items.pop(request.key, None)
+        return empty_pb2.Empty()
+
+
+def _matches(filter, doc):
+    if not filter:
+        return True
+    (op, arg), = filter.items()
+    if op == 'AND':
+        return all(_matches(f, doc) for f in arg)
+    if op == 'OR':
+        return any(_matches(f, doc) for f in arg)
+    (field, value), = arg.items()
+    return doc.get(field) in value if op == 'IN' else doc.get(field) == value
+
+
+class _Health(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalSidecar:
+    def __init__(self, latency_ms=0.0, workers=32):
+        self.servicer = InMemoryDapr(latency_ms)
+        self._grpc = grpc.server(futures.ThreadPoolExecutor(max_workers=workers))
+        api_service_v1.add_DaprServicer_to_server(self.servicer, self._grpc)
+        self.grpc_port = self._grpc.add_insecure_port('127.0.0.1:0')
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), _Health)
+        self.http_port = self._http.server_address[1]
+
+    def start(self):
+        self._grpc.start()
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+        for name, value in self.environ().items():
+            setattr(settings, name, value)
+
+    def environ(self):
+        """Environment variables that point a separately started app at this sidecar."""
+        return {
+            'DAPR_GRPC_ENDPOINT': f'127.0.0.1:{self.grpc_port}',
+            'DAPR_HTTP_ENDPOINT': f'http://127.0.0.1:{self.http_port}',
+        }
+
+    def stop(self):
+        self._http.shutdown()
+        self._grpc.stop(grace=None)
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class OrderCache:
+    """A size- and TTL-bounded LRU of decoded orders, keyed by state key.
+
+    Each entry keeps the ETag the sidecar returned with it. A fresh entry is
+    served without a sidecar call. Once its TTL has passed it is stale: the
+    caller reads the key again, and if the ETag is unchanged the cached value
+    is kept and its TTL restarted, so only the decode is saved. A size of 0
+    disables the cache.
+
+    Every invalidation bumps a generation. A reader takes generation() before
+    it fetches a key and hands it to put(), which drops the value if the key
+    was invalidated in the meantime: the fetch may have read it before the
+    write, and caching it would undo the invalidation. Only the last `size`
+    invalidated keys are remembered; a put older than the ones forgotten is
+    dropped too.
+    """
+
+    def __init__(self, size=1024, ttl=5.0, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, etag, stored_at)
+        self._invalidated = OrderedDict()  # key -> generation of its last invalidation
+        self._generation = 0
+        self._forgotten = 0  # newest generation dropped from _invalidated
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "evictions": 0, "invalidations": 0,
+                         "discarded": 0}
+
+    def lookup(self, key):
+        """Return (value, etag, fresh) for a cached key, or None on a miss."""
+        if not self.size:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            value, etag, stored_at = entry
+            fresh = self._clock() - stored_at < self.ttl
+            self.counters["hits" if fresh else "stale"] += 1
+            return value, etag, fresh
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def put(self, key, value, etag, generation=None):
+        """Cache a value fetched after generation() returned `generation`."""
+        if not self.size:
+            return
+        with self._lock:
+            if generation is not None and (generation < self._forgotten
+                                           or self._invalidated.get(key, -1) > generation):
+                self.counters["discarded"] += 1
+                return
+            self._entries[key] = (value, etag, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def revalidate(self, key, etag):
+        """Restart the TTL of a stale entry the sidecar confirmed is unchanged."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == etag:
+                self._entries[key] = (entry[0], etag, self._clock())
+                self.counters["revalidated"] += 1
+
+    def invalidate(self, key):
+        if not self.size:
+            return
+        with self._lock:
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.size:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+            if self._entries.pop(key, None) is not None:
+                self.counters["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"] + self.counters["stale"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "size": self.size,
+                "ttl": self.ttl,
+                "hitRate": self.counters["hits"] / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from dapr.clients import DaprClient
+import itertools
+import logging
+import threading
+import grpc
+
+# Status codes that mean the channel itself is unusable, rather than the call
+# having failed on the sidecar side. Only these trigger a reconnect.
+RECONNECT_CODES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.CANCELLED)
+
+
+class DaprClientPool:
+    """A fixed set of long-lived DaprClients shared by every request.
+
+    Opening a DaprClient waits for the sidecar health endpoint and dials a new
+    gRPC channel, which costs more than the state call itself. The pool opens
+    its clients once, hands them out round-robin, and replaces a client whose
+    channel has failed instead of reconnecting on every request.
+    """
+
+    def __init__(self, size=1, factory=DaprClient):
+        self._size = max(1, size)
+        self._factory = factory
+        self._clients = []
+        self._lock = threading.Lock()
+        self._reconnecting = set()
+        self._next = itertools.count()
+
+    def open(self):
+        with self._lock:
+            self._clients = [self._factory() for _ in range(self._size)]
+        logging.info('Dapr client pool opened with %s client(s)', self._size)
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+        logging.info('Dapr client pool closed')
+
+    @contextmanager
+    def client(self):
+        """Borrow a client for one request. The client is not exclusive:
+        gRPC channels multiplex concurrent calls, so nothing is checked in or out."""
+        slot = next(self._next) % self._size
+        client = self._clients[slot]
+        try:
+            yield client
+        except grpc.RpcError as err:
+            if err.code() in RECONNECT_CODES:
+                self._reconnect(slot, client)
+            raise
+
+    def check(self):
+        """Probe every client with a cheap metadata call and reconnect any
+        whose channel has failed. Returns the number of healthy clients."""
+        healthy = 0
+        for slot, client in enumerate(list(self._clients)):
+            try:
+                client.get_metadata()
+                healthy += 1
+            except grpc.RpcError as err:
+                logging.warning('Dapr client %s failed health check: %s', slot, err.code())
+                self._reconnect(slot, client)
+        return healthy
+
+    def _reconnect(self, slot, failed):
+        """Replace a failed client. If no new client can be opened the failed
+        one stays in place, to be retried by the next failure or health check."""
+        with self._lock:
+            # Another request may already have replaced this client, or be
+            # replacing it.
+            if slot >= len(self._clients) or self._clients[slot] is not failed or slot in self._reconnecting:
+                return
+            self._reconnecting.add(slot)
+        try:
+            # Opening a client waits for the sidecar, for up to
+            # DAPR_HEALTH_TIMEOUT during an outage; other slots are not held up.
+            replacement = self._factory()
+        except Exception as err:
+            logging.warning('Dapr client %s could not reconnect: %r', slot, err)
+            return
+        finally:
+            with self._lock:
+                self._reconnecting.discard(slot)
+        with self._lock:
+            replaced = slot < len(self._clients) and self._clients[slot] is failed
+            if replaced:
+                self._clients[slot] = replacement
+        if not replaced:
+            # The pool was closed while the client was being opened.
+            replacement.close()
+            return
+        failed.close()
+        logging.info('Dapr client %s reconnected', slot)
@@ -0,0 +1,73 @@
+import msgpack
+import orjson
+
+
+class JsonCodec:
+    name = 'json'
+    content_type = 'application/json'
+
+    def encode(self, value):
+        return orjson.dumps(value)
+
+    def decode(self, data):
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    name = 'msgpack'
+    content_type = 'application/msgpack'
+
+    def encode(self, value):
+        return msgpack.packb(value)
+
+    def decode(self, data):
+        return msgpack.unpackb(data)
+
+
+class LegacyTextCodec:
+    """Reads the `orderId=1` text earlier versions of the application stored,
+    str() of the order model. Never used for writes."""
+
+    name = 'text'
+    content_type = 'text/plain'
+
+    def decode(self, data):
+        text = data.decode() if isinstance(data, bytes) else data
+        fields = [field.split('=', 1) for field in text.split()]
+        if not fields or any(len(field) != 2 for field in fields):
+            raise ValueError('Not a field=value text value')
+        return dict(fields)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), MsgpackCodec())}
+
+
+class StateCodec:
+    """Encodes values with one configured codec and decodes with any of them.
+
+    Writes always use the configured codec and record its content type in the
+    state metadata. Reads try the configured codec first and fall back to the
+    others, then to the legacy text form, so neither changing STATE_CODEC nor
+    upgrading from the text form strands values already stored.
+    """
+
+    def __init__(self, name='json'):
+        if name not in CODECS:
+            raise ValueError(f'Unknown state codec {name!r}, expected one of {sorted(CODECS)}')
+        self.codec = CODECS[name]
+        self.fallbacks = [codec for codec in CODECS.values() if codec is not self.codec] + [LegacyTextCodec()]
+        self.metadata = {'contentType': self.codec.content_type}
+
+    def encode(self, value):
+        return self.codec.encode(value)
+
+    def decode(self, data):
+        try:
+            return self.codec.decode(data)
+        except ValueError as err:
+            for codec in self.fallbacks:
+                try:
+                    return codec.decode(data)
+                except ValueError:
+                    continue
+            raise err
@@ -0,0 +1,31 @@
+from dapr.clients.grpc._state import Concurrency, Consistency, StateOptions
+import random
+import time
+import grpc
+
+# First-write-wins: a write carrying an ETag succeeds only if the stored item
+# still has that ETag, and a write without one succeeds only if the key does
+# not exist yet. Strong consistency makes the check see the latest write.
+FIRST_WRITE = StateOptions(consistency=Consistency.strong, concurrency=Concurrency.first_write)
+
+
+def is_conflict(err):
+    """The sidecar reports an ETag mismatch, or a first-write to a key that
+    already exists, as ABORTED."""
+    return err.code() == grpc.StatusCode.ABORTED
+
+
+def retry_on_conflict(attempt, retries=5, backoff=0.005):
+    """Call attempt() until it does not conflict, up to retries extra times.
+
+    attempt must re-read whatever it writes on each call, so a retry is based
+    on the winning write. Waits between attempts are jittered and doubled each
+    time, which spreads out writers competing for the same key.
+    """
+    for n in range(retries + 1):
+        try:
+            return attempt()
+        except grpc.RpcError as err:
+            if not is_conflict(err) or n == retries:
+                raise
+            time.sleep(random.uniform(0, backoff * 2 ** n))
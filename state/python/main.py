@@ -1,59 +1,406 @@
-from dapr.clients import DaprClient
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel
+from cache import OrderCache
+from client_pool import DaprClientPool
+from concurrent.futures import ThreadPoolExecutor
+from concurrency import FIRST_WRITE, is_conflict, retry_on_conflict
+from contextlib import asynccontextmanager
+from dapr.clients.grpc._request import TransactionalStateOperation, TransactionOperationType
+from dapr.clients.grpc._state import StateItem
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from model import Order, OrderIds, OrderTransaction, decode_order, encode_order, state_codec
+import asyncio
+import json
 import logging
+import metrics
 import grpc
 import os
+import warnings
 
-app = FastAPI()
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 
-logging.basicConfig(level=logging.INFO)
-
-class Order(BaseModel):
-    orderId: int
+# query_state warns on every call that the query API is alpha; the README says
+# so once instead.
+warnings.filterwarnings('ignore', message='The State Store Query API is an Alpha')
 
 statestore_name = os.getenv('STATESTORE_NAME', 'statestore')
+client_pool_size = int(os.getenv('DAPR_CLIENT_POOL_SIZE', '2'))
+client_health_interval = float(os.getenv('DAPR_CLIENT_HEALTH_INTERVAL', '30'))
+bulk_chunk_size = int(os.getenv('BULK_CHUNK_SIZE', '100'))
+bulk_parallelism = int(os.getenv('BULK_PARALLELISM', '4'))
+order_cache_size = int(os.getenv('ORDER_CACHE_SIZE', '1024'))
+order_cache_ttl = float(os.getenv('ORDER_CACHE_TTL', '5'))
+conflict_retries = int(os.getenv('CONFLICT_RETRIES', '5'))
+# A state store with outbox publishing configured (see outboxstore.yaml).
+outbox_statestore_name = os.getenv('OUTBOX_STATESTORE_NAME', 'outboxstore')
 
-@app.post('/order', status_code=201)
-def create_state_item(order: Order):
-    with DaprClient() as d:
+# One set of Dapr clients for the lifetime of the app, instead of a new gRPC
+# channel per request.
+client_pool = DaprClientPool(size=client_pool_size, factory=metrics.client_factory)
+
+# Bulk requests are split into chunks of bulk_chunk_size keys, and up to
+# bulk_parallelism chunks are sent to the sidecar at once.
+bulk_executor = ThreadPoolExecutor(max_workers=bulk_parallelism)
+
+# Recently read orders, revalidated by ETag once their TTL passes. Writes made
+# through this app invalidate their keys; writes from elsewhere are picked up
+# within one TTL.
+order_cache = OrderCache(size=order_cache_size, ttl=order_cache_ttl)
+
+async def check_client_pool():
+    while True:
+        await asyncio.sleep(client_health_interval)
         try:
-            d.save_state(store_name=statestore_name,
-                         key=str(order.orderId), value=str(order))
-            logging.info('Save state item successful. Order saved with key: %s and value: %s' % (str(order.orderId), str(order)))
+            await asyncio.to_thread(client_pool.check)
+        except Exception:
+            # Keep checking: an error here must not end the task for good.
+            logging.exception('Error occurred while checking the Dapr client pool')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(client_pool.open)
+    health_check = asyncio.create_task(check_client_pool())
+    yield
+    health_check.cancel()
+    bulk_executor.shutdown()
+    await asyncio.to_thread(client_pool.close)
+
+app = FastAPI(lifespan=lifespan)
+
+if metrics.enabled:
+    metrics.instrument(app)
+
+@app.post('/order', status_code=201)
+def create_state_item(order: Order, if_none_match: str | None = Header(default=None)):
+    # `If-None-Match: *` makes this a conditional create: first-write-wins
+    # without an ETag only succeeds while the key does not exist.
+    options = FIRST_WRITE if if_none_match == '*' else None
+    try:
+        with client_pool.client() as d:
+            d.save_state(store_name=statestore_name, key=str(order.orderId), value=encode_order(order),
+                         options=options, state_metadata=state_codec.metadata)
+            logging.info('Save state item successful. Order saved with key: %s and value: %s', order.orderId, order)
             return {"id": order.orderId, "message": "Order created successfully"}
-        except grpc.RpcError as err:
-            logging.info('Error occurred while saving state item %s. Exception= %' % (str(order.orderId), {err.details()}))
-            raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+    except grpc.RpcError as err:
+        if options and is_conflict(err):
+            logging.info('State item with key %s already exists', order.orderId)
+            raise HTTPException(status_code=412, detail={"error": {"code": "ORDER_EXISTS", "message": f"Order with id '{order.orderId}' already exists"}})
+        logging.error('Error occurred while saving state item %s. Exception= %s', order.orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+    finally:
+        order_cache.invalidate(str(order.orderId))
 
 
 @app.get('/order/{orderId}')
-def get_state_item(orderId: int):
-    with DaprClient() as d:
-        try:
-            kv = d.get_state(statestore_name, str(orderId))
+def get_state_item(orderId: int, response: Response):
+    key = str(orderId)
+    cached = order_cache.lookup(key)
+    if cached and cached[2]:
+        if cached[1]:
+            response.headers['ETag'] = quote_etag(cached[1])
+        logging.info('Get state item successful. Order retrieved: %s (cached)', key)
+        return {"data": cached[0]}
+    # Taken before the fetch, so a write that lands while it is in flight
+    # keeps the value fetched from being cached.
+    generation = order_cache.generation()
+    try:
+        with client_pool.client() as d:
+            kv = d.get_state(statestore_name, key)
             if not kv.data:
-                logging.info('State item with key %s does not exist' % str(orderId))
+                order_cache.invalidate(key)
+                logging.info('State item with key %s does not exist', orderId)
                 raise HTTPException(status_code=404, detail={"error": {"code": "ORDER_NOT_FOUND", "message": f"Order with id '{orderId}' not found"}})
+            elif cached and kv.etag and kv.etag == cached[1]:
+                order_cache.revalidate(key, kv.etag)
+                order = cached[0]
             else:
-                logging.info('Get state item successful. Order retrieved: %s' % str(orderId))
-                return {"data": kv.data}
+                order = decode_order(kv.data)
+                order_cache.put(key, order, kv.etag, generation)
+            if kv.etag:
+                response.headers['ETag'] = quote_etag(kv.etag)
+            logging.info('Get state item successful. Order retrieved: %s', orderId)
+            return {"data": order}
         
-        except grpc.RpcError as err:
-            logging.info('Error occurred while retrieving state item: %s. Exception= %s' % (str(orderId), {err.details()}))
-            raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+    except grpc.RpcError as err:
+        logging.error('Error occurred while retrieving state item: %s. Exception= %s', orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+    except ValueError as err:
+        logging.error('Error occurred while decoding state item: %s. Exception= %s', orderId, err)
+        raise HTTPException(status_code=500, detail={"error": {"code": "INVALID_STORED_ORDER", "message": f"Order with id '{orderId}' could not be decoded"}})
+
+def quote_etag(etag):
+    return f'"{etag}"'
+
+def unquote_etag(header):
+    return header.removeprefix('W/').strip('"')
+
+@app.put('/order/{orderId}')
+def update_state_item(orderId: int, order: Order, if_match: str | None = Header(default=None)):
+    """Replace an existing order without clobbering a concurrent update.
+
+    With `If-Match`, the write only succeeds if the order still has that ETag
+    and a mismatch is returned as 412. Without it, the current ETag is read and
+    the write retried on conflict, up to conflict_retries times.
+    """
+    if order.orderId != orderId:
+        raise HTTPException(status_code=400, detail={"error": {"code": "ORDER_ID_MISMATCH", "message": "orderId in the body does not match the path"}})
+    key = str(orderId)
+
+    def write(d, etag):
+        d.save_state(store_name=statestore_name, key=key, value=encode_order(order), etag=etag,
+                     options=FIRST_WRITE, state_metadata=state_codec.metadata)
+
+    def read_and_write():
+        with client_pool.client() as d:
+            etag = d.get_state(statestore_name, key).etag
+            if not etag:
+                raise HTTPException(status_code=404, detail={"error": {"code": "ORDER_NOT_FOUND", "message": f"Order with id '{orderId}' not found"}})
+            write(d, etag)
+
+    try:
+        if if_match:
+            with client_pool.client() as d:
+                write(d, unquote_etag(if_match))
+        else:
+            retry_on_conflict(read_and_write, retries=conflict_retries)
+        logging.info('Update state item successful. Order updated: %s', orderId)
+        return {"id": orderId, "message": "Order updated successfully"}
+    except grpc.RpcError as err:
+        if is_conflict(err):
+            logging.info('Update of state item %s lost to a concurrent write', orderId)
+            raise HTTPException(status_code=412, detail={"error": {"code": "ETAG_MISMATCH", "message": f"Order with id '{orderId}' was modified concurrently"}})
+        logging.error('Error occurred while updating state item: %s. Exception= %s', orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+    finally:
+        order_cache.invalidate(key)
 
 @app.delete('/order/{orderId}')
 def delete_state_item(orderId: int):
-    with DaprClient() as d:
-        try:
+    try:
+        with client_pool.client() as d:
             d.delete_state(statestore_name, str(orderId))
-            logging.info('Delete state item successful. Order deleted: %s' % str(orderId))
+            logging.info('Delete state item successful. Order deleted: %s', orderId)
             return Response(status_code=204)
+    except grpc.RpcError as err:
+        logging.error('Error occurred while deleting state item: %s. Exception= %s', orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+    finally:
+        order_cache.invalidate(str(orderId))
+
+def chunked(items):
+    return [items[i:i + bulk_chunk_size] for i in range(0, len(items), bulk_chunk_size)]
+
+def run_chunks(operation, items):
+    """Apply operation to each chunk of items in parallel and flatten the
+    per-key results, keeping the order the keys were given in."""
+    results = []
+    for chunk_results in bulk_executor.map(operation, chunked(items)):
+        results.extend(chunk_results)
+    return results
+
+def bulk_response(results, success_code):
+    failed = sum(1 for result in results if result["status"] == "error")
+    # 207 Multi-Status: some keys succeeded and some did not, see each result.
+    status_code = success_code if not failed else 207 if failed < len(results) else 500
+    return JSONResponse(status_code=status_code, content={"results": results})
+
+def save_chunk(orders):
+    try:
+        with client_pool.client() as d:
+            d.save_bulk_state(store_name=statestore_name, states=[
+                StateItem(key=str(order.orderId), value=encode_order(order), metadata=state_codec.metadata)
+                for order in orders])
+        return [{"id": order.orderId, "status": "saved"} for order in orders]
+    except grpc.RpcError as err:
+        logging.error('Error occurred while saving %s state items. Exception= %s', len(orders), err.details())
+        return [{"id": order.orderId, "status": "error", "error": err.details()} for order in orders]
+    finally:
+        for order in orders:
+            order_cache.invalidate(str(order.orderId))
+
+def get_chunk(order_ids):
+    try:
+        with client_pool.client() as d:
+            response = d.get_bulk_state(statestore_name, [str(order_id) for order_id in order_ids],
+                                        parallelism=bulk_parallelism)
+    except grpc.RpcError as err:
+        logging.error('Error occurred while retrieving %s state items. Exception= %s', len(order_ids), err.details())
+        return [{"id": order_id, "status": "error", "error": err.details()} for order_id in order_ids]
+    results = []
+    for item in response.items:
+        if item.error:
+            results.append({"id": int(item.key), "status": "error", "error": item.error})
+        elif not item.data:
+            results.append({"id": int(item.key), "status": "not_found"})
+        else:
+            try:
+                results.append({"id": int(item.key), "status": "found", "data": decode_order(item.data).model_dump()})
+            except ValueError:
+                results.append({"id": int(item.key), "status": "error", "error": "Stored value could not be decoded"})
+    return results
+
+def delete_chunk(order_ids):
+    # The SDK has no bulk delete, so a chunk of deletes goes to the sidecar as
+    # one transaction instead.
+    try:
+        with client_pool.client() as d:
+            d.execute_state_transaction(store_name=statestore_name, operations=[
+                TransactionalStateOperation(key=str(order_id), operation_type=TransactionOperationType.delete)
+                for order_id in order_ids])
+        return [{"id": order_id, "status": "deleted"} for order_id in order_ids]
+    except grpc.RpcError as err:
+        logging.error('Error occurred while deleting %s state items. Exception= %s', len(order_ids), err.details())
+        return [{"id": order_id, "status": "error", "error": err.details()} for order_id in order_ids]
+    finally:
+        for order_id in order_ids:
+            order_cache.invalidate(str(order_id))
+
+@app.post('/orders/bulk', status_code=201)
+def create_state_items(orders: list[Order]):
+    results = run_chunks(save_chunk, orders)
+    logging.info('Bulk save state items finished. %s order(s) processed', len(results))
+    return bulk_response(results, 201)
+
+@app.get('/orders')
+def get_state_items(ids: str):
+    try:
+        order_ids = [int(order_id) for order_id in ids.split(',') if order_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"error": {"code": "INVALID_ORDER_IDS", "message": "ids must be a comma-separated list of order ids"}})
+    results = run_chunks(get_chunk, order_ids)
+    logging.info('Bulk get state items finished. %s order(s) processed', len(results))
+    return bulk_response(results, 200)
+
+@app.delete('/orders/bulk')
+def delete_state_items(request: OrderIds):
+    results = run_chunks(delete_chunk, request.ids)
+    logging.info('Bulk delete state items finished. %s order(s) processed', len(results))
+    return bulk_response(results, 200)
+
+@app.post('/orders/transaction')
+def execute_order_transaction(transaction: OrderTransaction):
+    """Apply every upsert and delete atomically, in one sidecar round-trip."""
+    keys = [str(order.orderId) for order in transaction.upserts] + [str(order_id) for order_id in transaction.deletes]
+    if not keys:
+        raise HTTPException(status_code=400, detail={"error": {"code": "EMPTY_TRANSACTION", "message": "A transaction needs at least one upsert or delete"}})
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail={"error": {"code": "DUPLICATE_ORDER_ID", "message": "Each order may appear only once in a transaction"}})
+    operations = [
+        TransactionalStateOperation(key=str(order.orderId), data=encode_order(order), metadata=state_codec.metadata)
+        for order in transaction.upserts
+    ] + [
+        TransactionalStateOperation(key=str(order_id), operation_type=TransactionOperationType.delete)
+        for order_id in transaction.deletes
+    ]
+    try:
+        with client_pool.client() as d:
+            d.execute_state_transaction(store_name=statestore_name, operations=operations)
+        logging.info('State transaction successful. %s upsert(s), %s delete(s)', len(transaction.upserts), len(transaction.deletes))
+        return {"message": "Transaction committed successfully", "upserts": len(transaction.upserts), "deletes": len(transaction.deletes)}
+    except grpc.RpcError as err:
+        logging.error('Error occurred while executing state transaction. Exception= %s', err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "TRANSACTION_FAILED", "message": "The transaction was not applied"}})
+    finally:
+        for key in keys:
+            order_cache.invalidate(key)
+
+@app.post('/order/outbox', status_code=201)
+def create_state_item_with_event(order: Order):
+    """Save an order and publish it as an event, atomically, in one round-trip.
+
+    The order is written in a state transaction on the outbox store, whose
+    component names the pubsub and topic to publish to. The sidecar publishes
+    the event only if the transaction commits, so the saved state and the
+    published events cannot diverge, which a save followed by a separate
+    publish cannot guarantee.
+    """
+    key = str(order.orderId)
+    try:
+        with client_pool.client() as d:
+            d.execute_state_transaction(store_name=outbox_statestore_name, operations=[
+                TransactionalStateOperation(key=key, data=encode_order(order), metadata=state_codec.metadata)])
+        logging.info('Outbox transaction successful. Order saved and published: %s', order.orderId)
+        return {"id": order.orderId, "message": "Order created and published successfully"}
+    except grpc.RpcError as err:
+        logging.error('Error occurred while saving state item %s through the outbox. Exception= %s', order.orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "OUTBOX_FAILED", "message": "The order could not be saved and published"}})
+    finally:
+        if outbox_statestore_name == statestore_name:
+            order_cache.invalidate(key)
+
+def build_query(filter, sort, limit, token):
+    query = {"page": {"limit": limit}}
+    if token:
+        query["page"]["token"] = token
+    if filter:
+        query["filter"] = json.loads(filter)
+    if sort:
+        query["sort"] = [
+            {"key": key.lstrip('-'), "order": "DESC" if key.startswith('-') else "ASC"}
+            for key in sort.split(',') if key.strip()
+        ]
+    return query
+
+def query_page(query):
+    with client_pool.client() as d:
+        return d.query_state(statestore_name, json.dumps(query))
+
+def ndjson(value):
+    return json.dumps(value, separators=(',', ':')) + '\n'
+
+def stream_query(query, page, pages):
+    """Yield one NDJSON line per order, fetching the next page only once the
+    previous one has been sent, so memory stays flat however many match."""
+    fetched = 1
+    while True:
+        for item in page.results:
+            try:
+                line = {"id": int(item.key), "etag": item.etag, "data": decode_order(item.value).model_dump()}
+            except ValueError:
+                # One undecodable value does not cut the stream short.
+                line = {"id": int(item.key), "error": {"code": "INVALID_STORED_ORDER", "message": "Stored value could not be decoded"}}
+            yield ndjson(line)
+        if not page.token:
+            return
+        if pages and fetched >= pages:
+            # Stopped on the page limit: the last line tells the caller where to resume.
+            yield ndjson({"nextToken": page.token})
+            return
+        query["page"]["token"] = page.token
+        try:
+            page = query_page(query)
         except grpc.RpcError as err:
-            logging.info('Error occurred while deleting state item:  %s. Exception= %s' % (str(orderId),{err.details()}))
-            raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+            logging.error('Error occurred while querying state items. Exception= %s', err.details())
+            yield ndjson({"error": {"code": "QUERY_FAILED", "message": "The query failed part way through"}, "nextToken": query["page"]["token"]})
+            return
+        fetched += 1
+
+@app.get('/orders/query')
+def query_state_items(filter: str | None = None, sort: str | None = None, limit: int = 100,
+                      token: str | None = None, pages: int = 0):
+    """Stream the orders matching a Dapr state query as NDJSON.
+
+    filter is a Dapr query filter as JSON, e.g. {"EQ":{"orderId":1}}; sort is a
+    comma-separated list of fields, each prefixed with - for descending. Results
+    are fetched limit at a time, following the continuation token, for at most
+    pages pages (0 means until the results run out).
+    """
+    try:
+        query = build_query(filter, sort, limit, token)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail={"error": {"code": "INVALID_FILTER", "message": "filter must be a JSON query filter"}})
+    try:
+        # The first page is fetched before the response starts, so a failing
+        # query still gets a proper error status.
+        page = query_page(query)
+    except grpc.RpcError as err:
+        logging.error('Error occurred while querying state items. Exception= %s', err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "QUERY_FAILED", "message": "The state store could not run the query"}})
+    logging.info('Query state items started')
+    return StreamingResponse(stream_query(query, page, pages), media_type='application/x-ndjson')
+
+@app.get('/cache')
+async def read_cache_stats():
+    return order_cache.stats()
 
 @app.get('/')
 async def read_root():
@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+from dapr.aio.clients import DaprClient
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
+from model import Order, decode_order, encode_order, state_codec
+import asyncio
+import logging
+import grpc
+import os
+
+# The async variant of main.py: the same single-order endpoints, but each
+# handler awaits the sidecar on the event loop instead of blocking one of
+# FastAPI's worker threads, so a burst of requests is no longer limited by the
+# size of that threadpool. Run it with `uvicorn main_aio:app`.
+
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
+
+statestore_name = os.getenv('STATESTORE_NAME', 'statestore')
+max_in_flight = int(os.getenv('MAX_IN_FLIGHT_STATE_CALLS', '256'))
+
+# Caps the sidecar calls awaiting a response at once. Requests beyond the cap
+# wait their turn here rather than piling onto the gRPC channel.
+sidecar_slots = asyncio.Semaphore(max_in_flight)
+dapr_client = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global dapr_client
+    dapr_client = DaprClient()
+    yield
+    await dapr_client.close()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.post('/order', status_code=201)
+async def create_state_item(order: Order):
+    try:
+        async with sidecar_slots:
+            await dapr_client.save_state(store_name=statestore_name, key=str(order.orderId),
+                                         value=encode_order(order), state_metadata=state_codec.metadata)
+        logging.info('Save state item successful. Order saved with key: %s and value: %s', order.orderId, order)
+        return {"id": order.orderId, "message": "Order created successfully"}
+    except grpc.RpcError as err:
+        logging.error('Error occurred while saving state item %s. Exception= %s', order.orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+
+@app.get('/order/{orderId}')
+async def get_state_item(orderId: int):
+    try:
+        async with sidecar_slots:
+            kv = await dapr_client.get_state(statestore_name, str(orderId))
+    except grpc.RpcError as err:
+        logging.error('Error occurred while retrieving state item: %s. Exception= %s', orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+    if not kv.data:
+        logging.info('State item with key %s does not exist', orderId)
+        raise HTTPException(status_code=404, detail={"error": {"code": "ORDER_NOT_FOUND", "message": f"Order with id '{orderId}' not found"}})
+    try:
+        order = decode_order(kv.data)
+    except ValueError as err:
+        logging.error('Error occurred while decoding state item: %s. Exception= %s', orderId, err)
+        raise HTTPException(status_code=500, detail={"error": {"code": "INVALID_STORED_ORDER", "message": f"Order with id '{orderId}' could not be decoded"}})
+    logging.info('Get state item successful. Order retrieved: %s', orderId)
+    return {"data": order}
+
+@app.delete('/order/{orderId}')
+async def delete_state_item(orderId: int):
+    try:
+        async with sidecar_slots:
+            await dapr_client.delete_state(statestore_name, str(orderId))
+        logging.info('Delete state item successful. Order deleted: %s', orderId)
+        return Response(status_code=204)
+    except grpc.RpcError as err:
+        logging.error('Error occurred while deleting state item: %s. Exception= %s', orderId, err.details())
+        raise HTTPException(status_code=500, detail={"error": {"code": "INTERNAL_ERROR", "message": "An internal server error occurred"}})
+
+@app.get('/')
+async def read_root():
+    health_message = "Health check passed. Everything is running smoothly!"
+    logging.info("Health check result: %s", health_message)
+    return {"status": "healthy", "message": health_message}
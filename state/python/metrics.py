@@ -0,0 +1,100 @@
+from dapr.clients import DaprClient
+import os
+import time
+import grpc
+
+# Metrics are off unless METRICS_ENABLED=true. When off, prometheus_client is
+# never imported, the pool hands out plain DaprClients and no middleware is
+# installed, so the request path is exactly as it was.
+enabled = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+
+if enabled:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+    SIDECAR_LATENCY = Histogram(
+        'order_sidecar_call_seconds', 'Latency of calls from the app to the Dapr sidecar',
+        ['operation'], buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5))
+    REQUEST_LATENCY = Histogram(
+        'order_request_seconds', 'Latency of HTTP requests handled by the app',
+        ['method', 'route', 'status'], buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+    PAYLOAD_SIZE = Histogram(
+        'order_payload_bytes', 'Size of the state payloads sent to and received from the sidecar',
+        ['operation', 'direction'], buckets=(16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576))
+    SIDECAR_ERRORS = Counter(
+        'order_sidecar_errors_total', 'Failed calls to the Dapr sidecar, by gRPC status code',
+        ['operation', 'code'])
+
+
+def _sent_bytes(kwargs):
+    if 'value' in kwargs:
+        return len(kwargs['value'])
+    if 'states' in kwargs:
+        return sum(len(state.value) for state in kwargs['states'])
+    if 'operations' in kwargs:
+        return sum(len(operation.data or b'') for operation in kwargs['operations'])
+    return None
+
+
+def _received_bytes(response):
+    if isinstance(getattr(response, 'data', None), bytes):
+        return len(response.data)
+    if hasattr(response, 'items'):
+        return sum(len(item.data) for item in response.items)
+    if hasattr(response, 'results'):
+        return sum(len(item.value) for item in response.results)
+    return None
+
+
+class InstrumentedClient:
+    """Wraps a DaprClient so every method call is timed, and its payload sizes
+    and failures recorded, under the method's name as the operation label."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            sent = _sent_bytes(kwargs)
+            if sent is not None:
+                PAYLOAD_SIZE.labels(name, 'sent').observe(sent)
+            start = time.perf_counter()
+            try:
+                response = attr(*args, **kwargs)
+            except grpc.RpcError as err:
+                SIDECAR_ERRORS.labels(name, err.code().name).inc()
+                raise
+            finally:
+                SIDECAR_LATENCY.labels(name).observe(time.perf_counter() - start)
+            received = _received_bytes(response)
+            if received is not None:
+                PAYLOAD_SIZE.labels(name, 'received').observe(received)
+            return response
+
+        return call
+
+
+def client_factory():
+    """The factory for the client pool: instrumented clients when metrics are on."""
+    return InstrumentedClient(DaprClient()) if enabled else DaprClient()
+
+
+def instrument(app):
+    """Time every request by its route template, and serve /metrics."""
+    from fastapi import Request, Response
+
+    @app.middleware('http')
+    async def time_request(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get('route')
+        REQUEST_LATENCY.labels(request.method, route.path if route else 'unmatched',
+                               response.status_code).observe(time.perf_counter() - start)
+        return response
+
+    @app.get('/metrics', include_in_schema=False)
+    def read_metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
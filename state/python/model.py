@@ -0,0 +1,24 @@
+from codec import StateCodec
+from pydantic import BaseModel
+import os
+
+class Order(BaseModel):
+    orderId: int
+
+class OrderIds(BaseModel):
+    ids: list[int]
+
+class OrderTransaction(BaseModel):
+    upserts: list[Order] = []
+    deletes: list[int] = []
+
+# Orders are stored as structured documents (JSON by default, or msgpack) so
+# reads decode straight back to an Order.
+state_codec = StateCodec(os.getenv('STATE_CODEC', 'json'))
+
+def encode_order(order):
+    return state_codec.encode(order.model_dump())
+
+def decode_order(data):
+    """Decode a stored order; raises ValueError for a value that is not one."""
+    return Order.model_validate(state_codec.decode(data))
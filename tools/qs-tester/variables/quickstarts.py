@@ -135,10 +135,9 @@ STATE_STORE_BODY = {
 STATE_RETRIEVE_BODY = {
     "csharp": {"data": {"orderId": 1}},
     "javascript": {"data": {"orderId": 1}},
+    "python": {"data": {"orderId": 1}},
     # java carries an extra empty message
     "java": {"data": {"orderId": 1}, "message": ""},
-    # python stores the string form of its model
-    "python": {"data": "orderId=1"},
 }
 
 # pubsub 6.1 publish, 201 Created